@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+"""Measure the cold start time of wdk subcommands
+
+Each command runs in a new interpreter with an empty configuration, the way a
+user runs wdk, and the median wall time is reported. With --max-ms, the exit
+code is 1 when a command is slower, to catch startup regressions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+COMMANDS = [
+    ['info'],
+    ['help'],
+    ['init', '--help'],
+    ['chores', '--help'],
+    ['mount', '--help'],
+    ['umount', '--help'],
+    ['restart', '--help'],
+    ['tailf', '--help'],
+    ['logs', '--help'],
+    ['logs', 'fetch', '--help'],
+    ['logs', 'search', '--help'],
+    ['repo', 'clone', '--help'],
+    ['repo', 'sync', '--help'],
+    ['repo', 'rm', 'orphan', '--help'],
+]
+
+_RUN_WDK = 'import sys; from wazo_sdk.main import main; sys.exit(main())'
+
+
+def measure(args: list[str], runs: int, env: dict[str, str]) -> list[float]:
+    command = [sys.executable, '-c', _RUN_WDK, *args]
+    # The first run fills the compiled project cache
+    subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10, help='runs per command')
+    parser.add_argument(
+        '--max-ms', type=float, help='fail when a median is above this time'
+    )
+    parser.add_argument('--json', action='store_true', help='print JSON results')
+    parser.add_argument(
+        'commands', nargs='*', help='commands to measure, e.g. "restart -h"'
+    )
+    args = parser.parse_args()
+
+    commands = [command.split() for command in args.commands] or COMMANDS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_file = os.path.join(tmp, 'config.yml')
+        with open(config_file, 'w') as f:
+            f.write(f'cache_dir: {tmp}/cache\nlocal_source: {tmp}\n')
+        # Compiled files are written to the default cache dir of the home
+        env = dict(os.environ, WDK_CONFIG_FILE=config_file, HOME=tmp)
+
+        results = []
+        for command in commands:
+            timings = measure(command, args.runs, env)
+            results.append(
+                {
+                    'command': ' '.join(command),
+                    'median_ms': round(statistics.median(timings), 1),
+                    'min_ms': round(min(timings), 1),
+                }
+            )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for result in results:
+            print(
+                f'{result["command"]:<24} median {result["median_ms"]:>7.1f} ms  '
+                f'min {result["min_ms"]:>7.1f} ms'
+            )
+
+    if args.max_ms is not None:
+        slow = [result for result in results if result['median_ms'] > args.max_ms]
+        for result in slow:
+            print(f'{result["command"]} is above {args.max_ms} ms', file=sys.stderr)
+        sys.exit(1 if slow else 0)
+
+
+if __name__ == '__main__':
+    main()
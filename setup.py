@@ -24,8 +24,12 @@ setup(
             'umount = wazo_sdk.commands.mount:Umount',
             'restart = wazo_sdk.commands.restart:Restart',
             'repo_clone = wazo_sdk.commands.repos.clone:RepoClone',
+            'repo_sync = wazo_sdk.commands.repos.sync:RepoSync',
             'repo_rm_orphan = wazo_sdk.commands.repos.rm_orphan:RemoveOrphanRepo',
             'tailf = wazo_sdk.commands.tailf:Tailf',
+            'logs = wazo_sdk.commands.logs:Logs',
+            'logs_fetch = wazo_sdk.commands.logs:LogsFetch',
+            'logs_search = wazo_sdk.commands.logs:LogsSearch',
         ],
     },
 )
@@ -1,26 +1,30 @@
 # Copyright 2021-2023 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from __future__ import annotations
+
 import os
-import subprocess
 
 from .chore import Chore
+from .scan import contains
+from .snapshot import RepoSnapshot
 
 
 class AuthorsChore(Chore):
     name = 'authors'
+    inputs = ['AUTHORS']
 
     @classmethod
     def print_expectations(cls) -> None:
         print('- AUTHORS file includes Wazo Communication Inc.')
 
     @classmethod
-    def is_applicable(cls, repo_path: str) -> bool:
-        return has_authors_file(repo_path)
+    def is_applicable(cls, repo: RepoSnapshot) -> bool:
+        return has_authors_file(repo)
 
     @classmethod
-    def is_dirty(cls, repo_path: str) -> bool:
-        return not has_wazo_author(repo_path)
+    def is_dirty(cls, repo: RepoSnapshot) -> bool:
+        return not has_wazo_author(repo)
 
     @classmethod
     def print_dirty_details(cls, repo_path: str, repo_name: str) -> None:
@@ -31,16 +35,9 @@ def authors_path(repo_path: str) -> str:
     return os.path.join(repo_path, 'AUTHORS')
 
 
-def has_authors_file(repo_path: str) -> bool:
-    return os.path.isfile(authors_path(repo_path))
+def has_authors_file(repo: RepoSnapshot) -> bool:
+    return repo.is_file('AUTHORS')
 
 
-def has_wazo_author(repo_path: str) -> bool:
-    command = [
-        'grep',
-        '--quiet',
-        '--ignore-case',
-        'Wazo Communication Inc.',
-        authors_path(repo_path),
-    ]
-    return subprocess.run(command).returncode == 0
+def has_wazo_author(repo: RepoSnapshot) -> bool:
+    return contains(repo.authors, b'Wazo Communication Inc.', ignore_case=True)
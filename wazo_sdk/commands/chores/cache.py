@@ -0,0 +1,99 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import TypedDict
+
+from .chore import Chore
+from .snapshot import RepoSnapshot
+
+
+class CachedResult(TypedDict):
+    key: str
+    applicable: bool
+    dirty: bool
+
+
+class ChoreCache:
+    """Chore results of each repository, kept until the files they read change
+
+    A result is keyed on the chore name and version, the commit checked out
+    and the size and modification time of the files the chore reads. A chore
+    without declared inputs is never cached.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self._filename = filename
+        self._lock = threading.Lock()
+        self._results: dict[str, dict[str, CachedResult]] = self._load()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, chore: type[Chore], repo: RepoSnapshot) -> str | None:
+        if chore.inputs is None:
+            return None
+
+        digest = hashlib.sha256()
+        digest.update(f'{chore.name}:{chore.version}:{repo.head}'.encode())
+        for name in chore.inputs:
+            if repo.is_dir(name):
+                paths = repo.tree_files(name)
+            else:
+                paths = [os.path.join(repo.path, name)]
+            for file_path in paths:
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    digest.update(f'{file_path}:missing\n'.encode())
+                    continue
+                digest.update(
+                    f'{file_path}:{stat.st_size}:{stat.st_mtime_ns}\n'.encode()
+                )
+        return digest.hexdigest()
+
+    def get(self, chore: type[Chore], repo_path: str, key: str) -> CachedResult | None:
+        with self._lock:
+            result = self._results.get(repo_path, {}).get(chore.name)
+            if result and result['key'] == key:
+                self.hits += 1
+                return result
+            self.misses += 1
+            return None
+
+    def set(
+        self,
+        chore: type[Chore],
+        repo_path: str,
+        key: str,
+        applicable: bool,
+        dirty: bool,
+    ) -> None:
+        with self._lock:
+            self._results.setdefault(repo_path, {})[chore.name] = {
+                'key': key,
+                'applicable': applicable,
+                'dirty': dirty,
+            }
+
+    def save(self) -> None:
+        directory = os.path.dirname(self._filename)
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            with tempfile.NamedTemporaryFile(
+                mode='w', dir=directory, delete=False
+            ) as f:
+                json.dump(self._results, f)
+        os.replace(f.name, self._filename)
+
+    def _load(self) -> dict[str, dict[str, CachedResult]]:
+        try:
+            with open(self._filename) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
@@ -2,19 +2,31 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .snapshot import RepoSnapshot
+
+
 class Chore:
     name = 'undefined'
+    # Bumped when the checks change, to ignore the cached results
+    version = 1
+    # Files and directories read by the checks, results are not cached when None
+    inputs: list[str] | None = None
 
     @classmethod
     def print_expectations(cls) -> None:
         print('Undefined expectations')
 
     @classmethod
-    def is_applicable(cls, repo_path: str) -> bool:
+    def is_applicable(cls, repo: RepoSnapshot) -> bool:
         return True
 
     @classmethod
-    def is_dirty(cls, repo_path: str) -> bool:
+    def is_dirty(cls, repo: RepoSnapshot) -> bool:
         return True
 
     @classmethod
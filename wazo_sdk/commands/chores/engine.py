@@ -0,0 +1,91 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TypedDict
+
+from .cache import ChoreCache
+from .chore import Chore
+from .snapshot import RepoSnapshot
+
+
+class ChoreResult(TypedDict):
+    chore: str
+    repo_name: str
+    repo_path: str
+    applicable: bool
+    dirty: bool
+    cached: bool
+    # Wall time of the check in seconds
+    duration: float
+
+
+class ChoreEngine:
+    """Checks every chore against every repository on a thread pool"""
+
+    def __init__(
+        self,
+        chores: list[type[Chore]],
+        jobs: int | None = None,
+        cache: ChoreCache | None = None,
+    ) -> None:
+        self._chores = chores
+        self._jobs = jobs
+        self._cache = cache
+
+    def run(self, repos: list[tuple[str, str]]) -> list[ChoreResult]:
+        """Results are ordered by repository, then by chore"""
+        order = {repo_path: index for index, (_, repo_path) in enumerate(repos)}
+        results = list(self.iter_results(repos))
+        # Sorting is stable, chores stay in order within a repository
+        results.sort(key=lambda result: order[result['repo_path']])
+        return results
+
+    def iter_results(self, repos: list[tuple[str, str]]) -> Iterator[ChoreResult]:
+        """Results of each repository as soon as it is checked"""
+        with ThreadPoolExecutor(max_workers=self._jobs) as executor:
+            futures = [
+                executor.submit(self._check_repo, repo_name, repo_path)
+                for repo_name, repo_path in repos
+            ]
+            for future in as_completed(futures):
+                yield from future.result()
+
+        if self._cache:
+            self._cache.save()
+
+    def _check_repo(self, repo_name: str, repo_path: str) -> list[ChoreResult]:
+        results: list[ChoreResult] = []
+        repo = RepoSnapshot(repo_path)
+        for chore in self._chores:
+            start = time.perf_counter()
+            applicable, dirty, cached = self._check(chore, repo)
+            results.append(
+                {
+                    'chore': chore.name,
+                    'repo_name': repo_name,
+                    'repo_path': repo_path,
+                    'applicable': applicable,
+                    'dirty': dirty,
+                    'cached': cached,
+                    'duration': time.perf_counter() - start,
+                }
+            )
+        return results
+
+    def _check(self, chore: type[Chore], repo: RepoSnapshot) -> tuple[bool, bool, bool]:
+        key = self._cache.key(chore, repo) if self._cache else None
+        if self._cache and key:
+            cached = self._cache.get(chore, repo.path, key)
+            if cached:
+                return cached['applicable'], cached['dirty'], True
+
+        applicable = chore.is_applicable(repo)
+        dirty = applicable and chore.is_dirty(repo)
+        if self._cache and key:
+            self._cache.set(chore, repo.path, key, applicable, dirty)
+        return applicable, dirty, False
@@ -4,25 +4,26 @@
 from __future__ import annotations
 
 import os
-from configparser import ConfigParser
 
 from .chore import Chore
+from .snapshot import RepoSnapshot
 
 
 class MypyChore(Chore):
     name = 'mypy'
+    inputs = ['tox.ini']
 
     @classmethod
     def print_expectations(cls) -> None:
         print('- tox linters run mypy')
 
     @classmethod
-    def is_applicable(cls, repo_path: str) -> bool:
-        return has_tox_linters(repo_path)
+    def is_applicable(cls, repo: RepoSnapshot) -> bool:
+        return has_tox_linters(repo)
 
     @classmethod
-    def is_dirty(cls, repo_path: str) -> bool:
-        return not has_tox_linters_running_mypy(repo_path)
+    def is_dirty(cls, repo: RepoSnapshot) -> bool:
+        return not has_tox_linters_running_mypy(repo)
 
     @classmethod
     def print_dirty_details(cls, repo_path: str, repo_name: str) -> None:
@@ -33,21 +34,12 @@ def tox_file_path(repo_path: str) -> str:
     return os.path.join(repo_path, 'tox.ini')
 
 
-def has_tox_linters(repo_path: str) -> bool:
-    return os.path.isfile(
-        tox_file_path(repo_path)
-    ) and 'testenv:linters' in read_tox_config(repo_path)
+def has_tox_linters(repo: RepoSnapshot) -> bool:
+    return repo.is_file('tox.ini') and 'testenv:linters' in repo.tox_config
 
 
-def read_tox_config(repo_path: str) -> ConfigParser:
-    tox_config = ConfigParser()
-    tox_config.read(tox_file_path(repo_path))
-    return tox_config
-
-
-def has_tox_linters_running_mypy(repo_path: str) -> bool:
-    tox_config = read_tox_config(repo_path)
+def has_tox_linters_running_mypy(repo: RepoSnapshot) -> bool:
     try:
-        return 'mypy' in tox_config['testenv:linters']['commands']
+        return 'mypy' in repo.tox_config['testenv:linters']['commands']
     except KeyError:
         return False
@@ -0,0 +1,60 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+"""In-process equivalents of the grep commands used by the chores
+
+Patterns are bytes regular expressions, matched case-insensitively when asked,
+like `grep --ignore-case`.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from collections.abc import Iterable
+
+
+def read_file(path: str) -> bytes | None:
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def contains(content: bytes | None, pattern: bytes, ignore_case: bool = False) -> bool:
+    if content is None:
+        return False
+    flags = re.IGNORECASE if ignore_case else 0
+    return re.search(pattern, content, flags) is not None
+
+
+def iter_tree_files(root: str) -> Iterable[str]:
+    """Regular files of a tree, symbolic links are not followed like `grep -r`"""
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path
+        except OSError:
+            continue
+
+
+def find_in_files(paths: Iterable[str], patterns: list[bytes]) -> set[bytes]:
+    """Returns the patterns found in any of the files, in a single pass"""
+    combined = re.compile(b'|'.join(b'(' + pattern + b')' for pattern in patterns))
+    found: set[bytes] = set()
+    for path in paths:
+        content = read_file(path)
+        if content is None:
+            continue
+        for match in combined.finditer(content):
+            found.add(patterns[match.lastindex - 1])  # type: ignore
+            if len(found) == len(patterns):
+                return found
+    return found
@@ -0,0 +1,108 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+from __future__ import annotations
+
+import os
+from configparser import ConfigParser
+from functools import cached_property
+
+from .scan import iter_tree_files, read_file
+
+
+class RepoSnapshot:
+    """Files of a repository, each read at most once and only when asked
+
+    All the chores of a run check the same snapshot of a repository. A
+    snapshot is used by a single thread.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._contents: dict[str, bytes | None] = {}
+        self._trees: dict[str, list[str]] = {}
+
+    @cached_property
+    def entries(self) -> dict[str, bool]:
+        """Names at the root of the repository, with whether each is a directory"""
+        entries = {}
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        entries[entry.name] = True
+                    elif entry.is_file():
+                        entries[entry.name] = False
+        except OSError:
+            pass
+        return entries
+
+    def is_file(self, name: str) -> bool:
+        return self.entries.get(name) is False
+
+    def is_dir(self, name: str) -> bool:
+        return self.entries.get(name) is True
+
+    def read(self, name: str) -> bytes | None:
+        if name not in self._contents:
+            self._contents[name] = read_file(os.path.join(self.path, name))
+        return self._contents[name]
+
+    def tree_files(self, name: str) -> list[str]:
+        """Regular files below a directory of the repository, sorted"""
+        if name not in self._trees:
+            root = os.path.join(self.path, name)
+            self._trees[name] = sorted(iter_tree_files(root))
+        return self._trees[name]
+
+    @cached_property
+    def head(self) -> str:
+        return git_head(self.path)
+
+    @cached_property
+    def authors(self) -> bytes | None:
+        return self.read('AUTHORS')
+
+    @cached_property
+    def dockerfile(self) -> bytes | None:
+        return self.read('Dockerfile')
+
+    @cached_property
+    def dockerfile_stages(self) -> list[str]:
+        """The FROM lines of the Dockerfile"""
+        lines = (self.dockerfile or b'').decode(errors='replace').splitlines()
+        return [line for line in lines if line[:4].upper() == 'FROM']
+
+    @cached_property
+    def tox_config(self) -> ConfigParser:
+        """The parsed tox.ini, empty when there is none"""
+        tox_config = ConfigParser()
+        content = self.read('tox.ini')
+        if content is not None:
+            source = os.path.join(self.path, 'tox.ini')
+            tox_config.read_string(content.decode(errors='replace'), source)
+        return tox_config
+
+
+def git_head(repo_path: str) -> str:
+    """The commit checked out, read from .git without running git"""
+    git_dir = os.path.join(repo_path, '.git')
+    if os.path.isfile(git_dir):
+        # Worktrees and submodules point to their git directory
+        content = (read_file(git_dir) or b'').decode(errors='replace').strip()
+        git_dir = os.path.join(repo_path, content.removeprefix('gitdir: '))
+
+    head = (read_file(os.path.join(git_dir, 'HEAD')) or b'').decode().strip()
+    if not head.startswith('ref: '):
+        return head
+
+    ref = head.removeprefix('ref: ')
+    commit = read_file(os.path.join(git_dir, ref))
+    if commit is not None:
+        return commit.decode().strip()
+
+    packed_refs = read_file(os.path.join(git_dir, 'packed-refs')) or b''
+    for line in packed_refs.decode(errors='replace').splitlines():
+        if line.endswith(f' {ref}'):
+            return line.split(' ', 1)[0]
+    return head
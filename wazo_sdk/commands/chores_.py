@@ -3,20 +3,26 @@
 
 from __future__ import annotations
 
+import json
 import os
+import time
 from argparse import ArgumentParser, Namespace
-from collections.abc import Generator
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from cliff.command import Command
 
 # Those classes need to be imported to be listed
 from .chores.authors import AuthorsChore  # noqa
+from .chores.cache import ChoreCache
 from .chores.chore import Chore
 from .chores.docker import DockerChore  # noqa
+from .chores.engine import ChoreEngine, ChoreResult
 from .chores.log_marker import LogMarkerChore  # noqa
 from .chores.mypy import MypyChore  # noqa
 
+if TYPE_CHECKING:
+    from wazo_sdk.config import Config
+
 ARCHIVES = {
     'sphinx-git',
     'wazo-admin-ui',
@@ -78,6 +84,11 @@ IGNORED = {
 }
 
 
+# Files directly in the cache dir without a pid file are removed as stale
+CHORES_CACHE_FILENAME = os.path.join('chores', 'results.json')
+OUTPUT_FORMATS = ['text', 'json', 'ndjson']
+
+
 class NoSuchChore(ValueError):
     def __init__(self, name: str) -> None:
         self.chore_name = name
@@ -86,15 +97,37 @@ class NoSuchChore(ValueError):
 class ChoreList(Command):
     """perform one or more chores"""
 
+    config: Config
+
     def get_parser(self, *args: Any, **kwargs: Any) -> ArgumentParser:
         parser = super().get_parser(*args, **kwargs)
         parser.add_argument('--list', action='store_true', help='list chores')
         parser.add_argument('chore', nargs='?', help='a chore to detail')
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='check every repository again instead of reusing cached results',
+        )
+        parser.add_argument(
+            '--jobs',
+            '-j',
+            type=int,
+            default=None,
+            help='number of repositories checked in parallel',
+        )
+        parser.add_argument(
+            '--format',
+            dest='output_format',
+            choices=OUTPUT_FORMATS,
+            default='text',
+            help='json and ndjson print one record per repository and chore, with timings',
+        )
         return parser
 
     def take_action(self, parsed_args: Namespace) -> None:
+        jobs, cache = parsed_args.jobs, not parsed_args.no_cache
         if parsed_args.list or parsed_args.chore is None:
-            self.print_chores_stats()
+            self.print_chores_stats(jobs, cache, parsed_args.output_format)
         elif parsed_args.chore:
             chore_name = parsed_args.chore
             try:
@@ -103,7 +136,7 @@ class ChoreList(Command):
                 print(f'Chore not found: {e.chore_name}')
                 return
 
-            self.list_chore_details(chore)
+            self.list_chore_details(chore, jobs, cache, parsed_args.output_format)
 
     def all_chores(self) -> list[type[Chore]]:
         return Chore.__subclasses__()
@@ -115,40 +148,96 @@ class ChoreList(Command):
         except StopIteration:
             raise NoSuchChore(name)
 
-    def list_chore_details(self, chore: type[Chore]) -> None:
+    def list_chore_details(
+        self,
+        chore: type[Chore],
+        jobs: int | None = None,
+        cache: bool = True,
+        output_format: str = 'text',
+    ) -> None:
+        engine = ChoreEngine([chore], jobs, self._cache() if cache else None)
+        if output_format != 'text':
+            self.print_report([chore], engine, output_format)
+            return
+
         print('Expectations:')
         chore.print_expectations()
         print()
         print('Repo/files not meeting expectations:')
         print()
-        for repo_name, repo_path in self.active_repos():
-            if chore.is_applicable(repo_path) and chore.is_dirty(repo_path):
-                chore.print_dirty_details(repo_path, repo_name)
-
-    def print_chores_stats(self) -> None:
-        for chore in self.all_chores():
-            active_repos = list(repo_path for _, repo_path in self.active_repos())
-            applicable_repo_paths = [
-                repo_path
-                for repo_path in active_repos
-                if chore.is_applicable(repo_path)
-            ]
-            clean_repo_paths = [
-                repo_path
-                for repo_path in applicable_repo_paths
-                if not chore.is_dirty(repo_path)
+        for result in engine.run(self.active_repos()):
+            if result['dirty']:
+                chore.print_dirty_details(result['repo_path'], result['repo_name'])
+
+    def print_chores_stats(
+        self, jobs: int | None = None, cache: bool = True, output_format: str = 'text'
+    ) -> None:
+        chores = self.all_chores()
+        engine = ChoreEngine(chores, jobs, self._cache() if cache else None)
+        if output_format != 'text':
+            self.print_report(chores, engine, output_format)
+            return
+
+        results = engine.run(self.active_repos())
+        for chore in chores:
+            chore_results = [
+                result
+                for result in results
+                if result['chore'] == chore.name and result['applicable']
             ]
-            total = len(applicable_repo_paths)
-            clean = len(clean_repo_paths)
+            total = len(chore_results)
+            clean = len([result for result in chore_results if not result['dirty']])
             print(f'{chore.name}:', clean, '/', total, 'OK' if clean == total else '')
 
-    def active_repos(self) -> Generator[tuple[str, str], None, None]:
-        all_repo_names = {
-            d
-            for d in os.listdir(self.config.local_source)
-            if os.path.isdir(os.path.join(self.config.local_source, d))
-        }
-        active_repos_ = all_repo_names - ARCHIVES - IGNORED
-        for repo_name in active_repos_:
-            repo_path = os.path.join(self.config.local_source, repo_name)
-            yield repo_name, repo_path
+    def print_report(
+        self, chores: list[type[Chore]], engine: ChoreEngine, output_format: str
+    ) -> None:
+        """ndjson prints each result as soon as it is known, then the summary"""
+        start = time.perf_counter()
+        repos = self.active_repos()
+        results = []
+        if output_format == 'ndjson':
+            for result in engine.iter_results(repos):
+                print(json.dumps({'type': 'result', **result}), flush=True)
+                results.append(result)
+        else:
+            results = engine.run(repos)
+
+        summary = summarize(chores, results, len(repos), time.perf_counter() - start)
+        if output_format == 'ndjson':
+            print(json.dumps({'type': 'summary', **summary}))
+        else:
+            print(json.dumps({'results': results, 'summary': summary}, indent=2))
+
+    def _cache(self) -> ChoreCache:
+        return ChoreCache(os.path.join(self.config.cache_dir, CHORES_CACHE_FILENAME))
+
+    def active_repos(self) -> list[tuple[str, str]]:
+        repos = []
+        with os.scandir(self.config.local_source) as it:
+            for entry in it:
+                if entry.name in ARCHIVES or entry.name in IGNORED:
+                    continue
+                if entry.is_dir():
+                    repos.append((entry.name, entry.path))
+        return sorted(repos)
+
+
+def summarize(
+    chores: list[type[Chore]], results: list[ChoreResult], repos: int, duration: float
+) -> dict[str, Any]:
+    """Counts and total check time of each chore"""
+    summary: dict[str, Any] = {'repos': repos, 'duration': duration, 'chores': []}
+    for chore in chores:
+        chore_results = [result for result in results if result['chore'] == chore.name]
+        applicable = [result for result in chore_results if result['applicable']]
+        summary['chores'].append(
+            {
+                'chore': chore.name,
+                'applicable': len(applicable),
+                'clean': len([result for result in applicable if not result['dirty']]),
+                'cached': len([result for result in chore_results if result['cached']]),
+                'duration': sum(result['duration'] for result in chore_results),
+            }
+        )
+    return summary
@@ -1,20 +1,24 @@
 # Copyright 2018-2024 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0+
 
+from __future__ import annotations
+
 from argparse import Namespace
+from typing import TYPE_CHECKING
 
 from cliff.command import Command
 
-from wazo_sdk.service import ServiceManager
+if TYPE_CHECKING:
+    from wazo_sdk.config import Config
 
 
 class Info(Command):
     """print WDK config information"""
 
-    service: ServiceManager
+    config: Config
 
     def take_action(self, parsed_args: Namespace) -> None:
-        service_config = self.service._config
+        service_config = self.config
         print(f'hostname: {service_config.hostname}')
         print(f'project_file: {service_config.project_file}')
         print(f'config_file: {service_config._args.config}')
@@ -5,13 +5,16 @@ from __future__ import annotations
 import logging
 from argparse import ArgumentParser, Namespace
 from collections.abc import Iterator
-from typing import Any, TypedDict
+from typing import TYPE_CHECKING, Any, TypedDict
 
-import sh
 from cliff.app import App
 from cliff.command import Command
 
-from wazo_sdk.config import Config
+if TYPE_CHECKING:
+    import sh
+
+    from wazo_sdk.config import Config
+    from wazo_sdk.ssh import SSHSession, SSHSessionManager
 
 
 class APTPolicyInfo(TypedDict):
@@ -21,24 +24,25 @@ class APTPolicyInfo(TypedDict):
 
 
 class PackageManager:
-    hostname: str
+    ssh: SSHSession
 
-    def __init__(self, hostname: str, logger: logging.Logger) -> None:
-        self.hostname = hostname
+    def __init__(self, ssh: SSHSession, logger: logging.Logger) -> None:
+        self.ssh = ssh
         self.logger = logger
 
     def ensure_packages(self, packages: list[str]) -> Iterator[APTPolicyInfo]:
         if packages:
-            ssh = sh.ssh.bake(self.hostname, _return_cmd=True)
-            self._install_packages(ssh, packages)
+            self._install_packages(self.ssh, packages)
 
-            yield from self._check_packages(ssh, packages)
+            yield from self._check_packages(self.ssh, packages)
 
     def _check_packages(
-        self, ssh: sh.Command, packages: list[str]
+        self, ssh: SSHSession, packages: list[str]
     ) -> Iterator[APTPolicyInfo]:
         for pkg in packages:
-            run_cmd: sh.RunningCommand = ssh(f'apt-cache policy {pkg}')
+            run_cmd: sh.RunningCommand = ssh(
+                f'apt-cache policy {pkg}', _return_cmd=True
+            )
 
             self.logger.debug('cmd=%s', run_cmd)
 
@@ -50,13 +54,13 @@ class PackageManager:
                 'name': pkg,
             }
 
-    def _install_packages(self, ssh: sh.Command, packages: list[str]) -> None:
+    def _install_packages(self, ssh: SSHSession, packages: list[str]) -> None:
         # setup_path = os.path.join(self._remote_dir, repo_name, 'setup.py')
         # self._wait_for_file(ssh, setup_path)
 
         # repo_dir = os.path.join(self._remote_dir, repo_name)
         cmd = ['apt-get', 'update', '&&', 'apt-get', 'install', '-y', *packages]
-        run_cmd: sh.RunningCommand = ssh(' '.join(cmd))
+        run_cmd: sh.RunningCommand = ssh(' '.join(cmd), _return_cmd=True)
         self.logger.debug("install command: %s", run_cmd)
         self.logger.debug("install command output: %s", run_cmd.stdout)
         return run_cmd
@@ -67,6 +71,7 @@ class Init(Command):
 
     # package_manager: PackageManager
     config: Config
+    ssh: SSHSessionManager
     logger = logging.getLogger(__name__)
     app: App
 
@@ -76,7 +81,9 @@ class Init(Command):
 
     def take_action(self, parsed_args: Namespace) -> None:
         assert self.config.hostname
-        package_manager = PackageManager(self.config.hostname, self.logger)
+        package_manager = PackageManager(
+            self.ssh.get(self.config.hostname), self.logger
+        )
         if not self.config.init_packages:
             self.app.stdout.write('no packages to install\n')
             return
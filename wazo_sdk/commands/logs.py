@@ -0,0 +1,178 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+from __future__ import annotations
+
+import datetime
+import re
+import sys
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from typing import TYPE_CHECKING, Any
+
+from cliff.command import Command
+
+from wazo_sdk.commands.tailf import pattern_argument
+from wazo_sdk.remote.follow import LEVELS
+
+if TYPE_CHECKING:
+    from wazo_sdk.service import ServiceManager
+
+_DURATION = re.compile(r'(\d+(?:\.\d+)?)([smhd])')
+_SECONDS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def time_argument(value: str) -> str | float:
+    """A duration before now such as 15m, a time of today or a date and time"""
+    match = _DURATION.fullmatch(value)
+    if match:
+        return float(match.group(1)) * _SECONDS[match.group(2)]
+
+    try:
+        if re.fullmatch(r'\d{2}:\d{2}(:\d{2})?', value):
+            time = datetime.time.fromisoformat(value)
+            return datetime.datetime.combine(datetime.date.today(), time).isoformat(' ')
+        return datetime.datetime.fromisoformat(value).isoformat(' ')
+    except ValueError:
+        raise ArgumentTypeError(f'invalid time: {value}')
+
+
+def _absolute(value: str | float | None) -> str | None:
+    """Durations before now are taken on the local clock"""
+    if isinstance(value, float):
+        time = datetime.datetime.now() - datetime.timedelta(seconds=value)
+        return time.isoformat(' ', timespec='seconds')
+    return value
+
+
+class Logs(Command):
+    """print the log lines of a service within a time range"""
+
+    service: ServiceManager
+
+    def get_parser(self, *args: Any, **kwargs: Any) -> ArgumentParser:
+        parser = super().get_parser(*args, **kwargs)
+        parser.add_argument('service', help='service whose log file is read')
+        parser.add_argument(
+            '--since',
+            '-s',
+            type=time_argument,
+            default=None,
+            help='start of the range: 15m, 2h, 14:30, "2026-01-31 14:30:00"',
+        )
+        parser.add_argument(
+            '--until',
+            '-u',
+            type=time_argument,
+            default=None,
+            help='end of the range, in the same formats as --since',
+        )
+        parser.add_argument(
+            '--compress',
+            '-z',
+            action='store_true',
+            help='gzip the lines sent by the Wazo',
+        )
+        parser.add_argument(
+            '--output',
+            '-o',
+            default=None,
+            help='write to a file instead, kept gzipped when its name ends with .gz',
+        )
+        return parser
+
+    def take_action(self, parsed_args: Namespace) -> None:
+        if not parsed_args.output:
+            self.service.logs(
+                parsed_args.service,
+                sys.stdout.buffer,
+                since=parsed_args.since,
+                until=parsed_args.until,
+                compress=parsed_args.compress,
+            )
+            return
+
+        gzipped = parsed_args.output.endswith('.gz')
+        with open(parsed_args.output, 'wb') as out:
+            self.service.logs(
+                parsed_args.service,
+                out,
+                since=parsed_args.since,
+                until=parsed_args.until,
+                compress=parsed_args.compress or gzipped,
+                decompress=not gzipped,
+            )
+
+
+class LogsFetch(Command):
+    """fetch the new lines of log files into local compressed archives"""
+
+    service: ServiceManager
+
+    def get_parser(self, *args: Any, **kwargs: Any) -> ArgumentParser:
+        parser = super().get_parser(*args, **kwargs)
+        parser.add_argument(
+            'services',
+            nargs='*',
+            help='services whose logs are fetched, all those with a log_filename by default',
+        )
+        return parser
+
+    def take_action(self, parsed_args: Namespace) -> None:
+        fetched = self.service.fetch_logs(parsed_args.services)
+        width = max((len(name) for name in fetched), default=0)
+        for name, size in fetched.items():
+            if size is None:
+                print(f'{name:<{width}}  failed')
+            else:
+                print(f'{name:<{width}}  {size} bytes fetched')
+
+
+class LogsSearch(Command):
+    """search the local archive of a log file fetched with `logs fetch`"""
+
+    service: ServiceManager
+
+    def get_parser(self, *args: Any, **kwargs: Any) -> ArgumentParser:
+        parser = super().get_parser(*args, **kwargs)
+        parser.add_argument('service', help='service whose archive is searched')
+        parser.add_argument(
+            '--since',
+            '-s',
+            type=time_argument,
+            default=None,
+            help='start of the range: 15m, 2h, 14:30, "2026-01-31 14:30:00"',
+        )
+        parser.add_argument(
+            '--until',
+            '-u',
+            type=time_argument,
+            default=None,
+            help='end of the range, in the same formats as --since',
+        )
+        parser.add_argument(
+            '--level',
+            '-l',
+            choices=list(LEVELS),
+            type=str.upper,
+            default=None,
+            help='only show lines of this level or above',
+        )
+        parser.add_argument(
+            '--grep',
+            '-g',
+            dest='pattern',
+            type=pattern_argument,
+            default=None,
+            help='only show lines matching this regular expression',
+        )
+        return parser
+
+    def take_action(self, parsed_args: Namespace) -> None:
+        self.service.search_logs(
+            parsed_args.service,
+            sys.stdout.buffer,
+            since=_absolute(parsed_args.since),
+            until=_absolute(parsed_args.until),
+            level=parsed_args.level,
+            pattern=parsed_args.pattern,
+        )
@@ -5,20 +5,84 @@ from __future__ import annotations
 
 import logging
 from argparse import ArgumentParser, Namespace
-from typing import Any
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import TYPE_CHECKING, Any
 
 from cliff.command import Command
 
-from wazo_sdk.mount import Mounter
-from wazo_sdk.service import ServiceManager
+if TYPE_CHECKING:
+    from wazo_sdk.config import Config
+    from wazo_sdk.mount import Mounter
+    from wazo_sdk.service import ServiceManager
 
 
-class Mount(Command):
-    """mount one or more services on a remote instance"""
-
+class _ParallelMountCommand(Command):
+    config: Config
     mounter: Mounter
     service: ServiceManager
 
+    def get_parser(self, *args: Any, **kwargs: Any) -> ArgumentParser:
+        parser = super().get_parser(*args, **kwargs)
+        parser.add_argument(
+            '--jobs',
+            '-j',
+            type=int,
+            default=None,
+            help='maximum number of repositories handled at once on the host',
+        )
+        parser.add_argument(
+            '--force',
+            '-f',
+            action='store_true',
+            help='redo the sync and setup.py develop even when considered up to date',
+        )
+        return parser
+
+    def run_parallel(
+        self,
+        action: Callable[[str], None],
+        repos: list[str],
+        parsed_args: Namespace,
+        description: str,
+    ) -> None:
+        jobs = max(parsed_args.jobs or self.config.mount_jobs, 1)
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(self._run_one, action, repo, description)
+                for repo in repos
+            ]
+            done = [repo for repo, future in zip(repos, futures) if future.result()]
+
+        if parsed_args.restart and done:
+            self._restart(done)
+
+    def _run_one(
+        self, action: Callable[[str], None], repo: str, description: str
+    ) -> bool:
+        try:
+            action(repo)
+        except Exception:
+            self.app.LOG.exception('Error %s repo %s', description, repo)
+            return False
+        return True
+
+    def _restart(self, repos: list[str]) -> None:
+        try:
+            results = self.service.restart(repos)
+        except Exception:
+            self.app.LOG.exception('Error restarting repos %s', ', '.join(repos))
+            return
+
+        for result in results:
+            if not result['success']:
+                self.app.LOG.error('Error restarting service %s', result['service'])
+
+
+class Mount(_ParallelMountCommand):
+    """mount one or more services on a remote instance"""
+
     def get_parser(self, *args: Any, **kwargs: Any) -> ArgumentParser:
         parser = super().get_parser(*args, **kwargs)
         parser.add_argument(
@@ -33,17 +97,8 @@ class Mount(Command):
         return parser
 
     def take_action(self, parsed_args: Namespace) -> None:
-        for repo in parsed_args.repos:
-            try:
-                self.mounter.mount(repo)
-            except Exception:
-                self.app.LOG.exception('Error mount repo %s', repo)
-            else:
-                if parsed_args.restart:
-                    try:
-                        self.service.restart(repo)
-                    except Exception:
-                        self.app.LOG.exception('Error restarting repo %s', repo)
+        mount = partial(self.mounter.mount, force=parsed_args.force)
+        self.run_parallel(mount, parsed_args.repos, parsed_args, 'mount')
 
         if parsed_args.list:
             mounted_repos = self.mounter.list_()
@@ -52,11 +107,9 @@ class Mount(Command):
                 self.app.LOG.info('%s %s', repo, state)
 
 
-class Umount(Command):
+class Umount(_ParallelMountCommand):
     """umount one or more services from a remote instance"""
 
-    mounter: Mounter
-    service: ServiceManager
     logger = logging.getLogger(__name__)
 
     def get_parser(self, *args: Any, **kwargs: Any) -> ArgumentParser:
@@ -74,14 +127,5 @@ class Umount(Command):
 
     def take_action(self, parsed_args: Namespace) -> None:
         repos = parsed_args.repos or [repo for repo, _ in self.mounter.list_()]
-        for repo in repos:
-            try:
-                self.mounter.umount(repo)
-            except Exception:
-                self.app.LOG.exception('Error unmount repo %s', repo)
-            else:
-                if parsed_args.restart:
-                    try:
-                        self.service.restart(repo)
-                    except Exception:
-                        self.app.LOG.exception('Error restarting repo %s', repo)
+        umount = partial(self.mounter.umount, force=parsed_args.force)
+        self.run_parallel(umount, repos, parsed_args, 'unmount')
@@ -1,43 +1,51 @@
-# Copyright 2018-2025 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2018-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0+
 
 from __future__ import annotations
 
-import logging
+import os
 from collections.abc import Generator
-from functools import cached_property
+from typing import TYPE_CHECKING
 
 from cliff.command import Command
-from github3 import GitHub, login
-from github3.repos import ShortRepository
 
-from wazo_sdk.config import Config
+if TYPE_CHECKING:
+    from wazo_sdk.config import Config
+    from wazo_sdk.github import GitHubListing, GitHubRepo
+
+GITHUB_CACHE_DIRNAME = 'github'
 
 
 class BaseRepoCommand(Command):
     config: Config
-    _github: GitHub | None = None
 
-    def login(self) -> GitHub | None:
+    def login(self) -> GitHubListing:
+        # An empty listing would make every local repo look orphaned
         if not self.config.github_orgs:
-            self.app.LOG.error('No GitHub organisations configured')
-            return None
-        if not self.config.github_username:
-            self.app.LOG.error('No GitHub username configured')
-            return None
+            raise Exception('No GitHub organisations configured')
         if not self.config.github_token:
-            self.app.LOG.error('No GitHub personal access token configured')
-            return None
-
-        logging.getLogger('github3').setLevel(logging.WARNING)
-        return login(self.config.github_username, self.config.github_token)
-
-    @cached_property
-    def github(self) -> GitHub:
-        if self._github is None:
-            self._github = self.login()
-        return self._github
-
-    def iter_all_repositories(self) -> Generator[ShortRepository, None, None]:
-        for org_name in self.config.github_orgs:
-            yield from self.github.organization(org_name).repositories()
+            raise Exception('No GitHub personal access token configured')
+
+        # Imported here to keep the startup of other commands fast
+        from wazo_sdk.github import GitHubListing
+
+        return GitHubListing(
+            os.path.join(self.config.cache_dir, GITHUB_CACHE_DIRNAME),
+            self.config.github_token,
+            self.config.github_api_url,
+        )
+
+    def iter_all_repositories(self) -> Generator[GitHubRepo, None, None]:
+        listing = self.login()
+        repos = listing.repositories(self.config.github_orgs)
+        self.app.LOG.debug(
+            'GitHub listing: %s pages fetched, %s not modified',
+            listing.fetched,
+            listing.not_modified,
+        )
+        yield from repos
+
+    def local_path(self, repo: GitHubRepo) -> str:
+        if repo['archived']:
+            return os.path.join(self.config.archive_dir, repo['name'])
+        return os.path.join(self.config.local_source, repo['name'])
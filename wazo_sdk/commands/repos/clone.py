@@ -1,14 +1,13 @@
-# Copyright 2018-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2018-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0+
 
 from __future__ import annotations
 
 import os
 from argparse import ArgumentParser, Namespace
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any
 
-from git import Repo
-
 from .base import BaseRepoCommand
 
 EXCLUDE_PATTERNS: list[str] = [
@@ -28,25 +27,91 @@ class RepoClone(BaseRepoCommand):
             action='store_true',
             help='include archived repos',
         )
+        parser.add_argument(
+            '--jobs',
+            '-j',
+            type=int,
+            default=None,
+            help='maximum number of repositories cloned at once',
+        )
+        parser.add_argument(
+            '--filter',
+            default=None,
+            help='partial clone filter, e.g. blob:none',
+        )
+        parser.add_argument(
+            '--depth',
+            type=int,
+            default=None,
+            help='clone only this many commits of history',
+        )
+        parser.add_argument(
+            '--archived-depth',
+            type=int,
+            default=None,
+            help='history depth of archived repos, overrides --depth',
+        )
+        parser.add_argument(
+            '--reference',
+            default=None,
+            help='local git repository whose objects are reused instead of downloaded',
+        )
         return parser
 
     def take_action(self, parsed_args: Namespace) -> None:
-        for repo in self.iter_all_repositories():
-            if repo.archived and not parsed_args.include_archived:
-                self.app.LOG.debug('Skipping archived repo %s...', repo.name)
-                continue
+        jobs = max(parsed_args.jobs or self.config.clone_jobs, 1)
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures: dict[str, Future[bool]] = {}
+            for repo in self.iter_all_repositories():
+                if repo['archived'] and not parsed_args.include_archived:
+                    self.app.LOG.debug('Skipping archived repo %s...', repo['name'])
+                    continue
+
+                if any(pattern in repo['name'] for pattern in EXCLUDE_PATTERNS):
+                    continue
+
+                dest_dir = self.local_path(repo)
+                if os.path.isdir(dest_dir):
+                    self.app.LOG.debug('Directory %s already exists.', repo['name'])
+                    continue
+
+                options = self._clone_options(parsed_args, repo['archived'])
+                futures[repo['name']] = executor.submit(
+                    self._clone, repo['name'], repo['ssh_url'], dest_dir, options
+                )
+
+        failed = [name for name, future in futures.items() if not future.result()]
+        if failed:
+            self.app.LOG.error('Failed to clone %s', ', '.join(sorted(failed)))
+
+    def _clone_options(self, parsed_args: Namespace, archived: bool) -> list[str]:
+        options = []
+        clone_filter = parsed_args.filter or self.config.clone_filter
+        if clone_filter:
+            options.append(f'--filter={clone_filter}')
 
-            if any(pattern in repo.name for pattern in EXCLUDE_PATTERNS):
-                continue
+        depth = parsed_args.depth
+        if archived:
+            depth = (
+                parsed_args.archived_depth or self.config.archive_clone_depth or depth
+            )
+        if depth:
+            options.append(f'--depth={depth}')
 
-            if repo.archived:
-                dest_dir = os.path.join(self.config.archive_dir, repo.name)
-            else:
-                dest_dir = os.path.join(self.config.local_source, repo.name)
+        reference = parsed_args.reference or self.config.clone_reference
+        if reference:
+            # Objects are copied, the clone keeps working if the reference is removed
+            options += [f'--reference-if-able={reference}', '--dissociate']
+        return options
 
-            if os.path.isdir(dest_dir):
-                self.app.LOG.debug('Directory %s already exists.', repo.name)
-                continue
+    def _clone(self, name: str, url: str, dest_dir: str, options: list[str]) -> bool:
+        # Imported here to keep the startup of other commands fast
+        from git import Repo
 
-            self.app.LOG.info('Cloning %s...', repo.name)
-            Repo.clone_from(repo.ssh_url, to_path=dest_dir)
+        self.app.LOG.info('Cloning %s...', name)
+        try:
+            Repo.clone_from(url, to_path=dest_dir, multi_options=options)
+        except Exception:
+            self.app.LOG.exception('Error cloning %s', name)
+            return False
+        return True
@@ -1,17 +1,27 @@
-# Copyright 2018-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2018-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0+
 
 from __future__ import annotations
 
+import json
 import os
+import subprocess
 from argparse import ArgumentParser, Namespace
+from concurrent.futures import ThreadPoolExecutor
 from shutil import rmtree
-from typing import Any
-
-from git import InvalidGitRepositoryError, Repo
+from typing import TYPE_CHECKING, Any
 
 from .base import BaseRepoCommand
 
+if TYPE_CHECKING:
+    from typing import TypedDict
+
+    class OrphanRepo(TypedDict):
+        name: str
+        path: str
+        reason: str
+        dirty: bool
+
 
 class RemoveOrphanRepo(BaseRepoCommand):
     """remove orphan locally repositories"""
@@ -22,6 +32,18 @@ class RemoveOrphanRepo(BaseRepoCommand):
         parser.add_argument(
             '-e', '--exclude', default=[], nargs="*", help='repo names to exclude'
         )
+        parser.add_argument(
+            '--jobs',
+            '-j',
+            type=int,
+            default=None,
+            help='maximum number of directories checked at once',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='print the orphan repos found as JSON, without deleting them',
+        )
         return parser
 
     def take_action(self, parsed_args: Namespace) -> None:
@@ -29,26 +51,33 @@ class RemoveOrphanRepo(BaseRepoCommand):
         archived_repos = set()
         self.app.LOG.info('Fetching repositories...')
         for repo in self.iter_all_repositories():
-            if repo.archived:
-                archived_repos.add(repo.name)
+            if repo['archived']:
+                archived_repos.add(repo['name'])
             else:
-                remote_repos.add(repo.name)
-
-        for directory in os.listdir(self.config.local_source):
-            if directory in remote_repos:
-                continue
-
-            local_path = os.path.join(self.config.local_source, directory)
-            try:
-                local_repo = Repo(local_path)
-            except InvalidGitRepositoryError:
-                continue
-
-            reason = 'Orphan'
-            if directory in archived_repos:
-                reason = 'Archived'
-
-            if local_repo.is_dirty():
+                remote_repos.add(repo['name'])
+        if not remote_repos:
+            raise Exception('No repositories listed on GitHub, not looking for orphans')
+
+        candidates = [
+            directory
+            for directory in sorted(os.listdir(self.config.local_source))
+            if directory not in remote_repos and directory not in parsed_args.exclude
+        ]
+        jobs = max(parsed_args.jobs or self.config.clone_jobs, 1)
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            found = executor.map(
+                lambda directory: self._classify(directory, archived_repos), candidates
+            )
+            orphans = [orphan for orphan in found if orphan]
+
+        if parsed_args.json:
+            print(json.dumps(orphans, indent=2))
+            return
+
+        # Prompts come after every directory is checked
+        for orphan in orphans:
+            directory, reason = orphan['name'], orphan['reason']
+            if orphan['dirty']:
                 self.app.LOG.warning('Directory %s is dirty. Skipping', directory)
                 continue
 
@@ -57,13 +86,25 @@ class RemoveOrphanRepo(BaseRepoCommand):
                 continue
 
             self.app.LOG.info('Deleting orphan repo %s (%s)...', directory, reason)
-            if not self.confirm_delete(local_path):
+            if not self.confirm_delete(orphan['path']):
                 self.app.LOG.info('Aborted')
                 continue
 
-            rmtree(local_path)
+            rmtree(orphan['path'])
             self.app.LOG.info('Deleted')
 
+    def _classify(self, directory: str, archived_repos: set[str]) -> OrphanRepo | None:
+        local_path = os.path.join(self.config.local_source, directory)
+        if not os.path.exists(os.path.join(local_path, '.git')):
+            return None
+
+        return {
+            'name': directory,
+            'path': local_path,
+            'reason': 'Archived' if directory in archived_repos else 'Orphan',
+            'dirty': is_dirty(local_path),
+        }
+
     def confirm_delete(self, path: str) -> bool:
         while True:
             message = f'Are you sure to delete {path} [y/n]? '
@@ -77,3 +118,17 @@ class RemoveOrphanRepo(BaseRepoCommand):
         if answer == 'n':
             return False
         return True
+
+
+def is_dirty(path: str) -> bool:
+    """Uncommitted changes to tracked files, like GitPython Repo.is_dirty()
+
+    A repository that git cannot read is considered dirty, to be kept.
+    """
+    result = subprocess.run(
+        ['git', 'status', '--porcelain', '--untracked-files=no'],
+        cwd=path,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    return result.returncode != 0 or bool(result.stdout.strip())
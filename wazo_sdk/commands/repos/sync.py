@@ -0,0 +1,131 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+from __future__ import annotations
+
+import os
+import time
+from argparse import ArgumentParser, Namespace
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from .base import BaseRepoCommand
+
+UPDATED = 'updated'
+UP_TO_DATE = 'up to date'
+DIRTY = 'dirty'
+AHEAD = 'ahead'
+DIVERGED = 'diverged'
+NO_UPSTREAM = 'no upstream'
+FAILED = 'failed'
+
+
+class RepoSync(BaseRepoCommand):
+    """fetch and fast-forward the local copy of all repos"""
+
+    def get_parser(self, *args: Any, **kwargs: Any) -> ArgumentParser:
+        parser = super().get_parser(*args, **kwargs)
+        parser.add_argument(
+            '-a',
+            '--include-archived',
+            action='store_true',
+            help='include archived repos',
+        )
+        parser.add_argument(
+            '--jobs',
+            '-j',
+            type=int,
+            default=None,
+            help='maximum number of repositories updated at once',
+        )
+        return parser
+
+    def take_action(self, parsed_args: Namespace) -> None:
+        start = time.monotonic()
+        jobs = max(parsed_args.jobs or self.config.clone_jobs, 1)
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures: dict[str, Future[str]] = {}
+            for repo in self.iter_all_repositories():
+                if repo['archived'] and not parsed_args.include_archived:
+                    continue
+
+                local_path = self.local_path(repo)
+                if not os.path.isdir(local_path):
+                    self.app.LOG.debug('Repo %s is not cloned. Skipping', repo['name'])
+                    continue
+
+                futures[repo['name']] = executor.submit(
+                    self._sync, repo['name'], local_path
+                )
+
+        statuses = {name: future.result() for name, future in futures.items()}
+        elapsed = time.monotonic() - start
+        self._report(statuses, elapsed)
+
+    def _sync(self, name: str, path: str) -> str:
+        try:
+            return self._fast_forward(name, path)
+        except Exception:
+            self.app.LOG.exception('Error updating %s', name)
+            return FAILED
+
+    def _fast_forward(self, name: str, path: str) -> str:
+        # Imported here to keep the startup of other commands fast
+        from git import GitCommandError, InvalidGitRepositoryError, Repo
+
+        try:
+            repo = Repo(path)
+        except InvalidGitRepositoryError:
+            self.app.LOG.warning('Directory %s is not a git repository', name)
+            return FAILED
+
+        try:
+            repo.git.fetch('--prune', '--quiet', 'origin')
+        except GitCommandError as e:
+            self.app.LOG.error('Error fetching %s: %s', name, e.stderr.strip())
+            return FAILED
+
+        # Untracked files are left alone by a fast-forward
+        if repo.is_dirty(untracked_files=False):
+            self.app.LOG.warning('Directory %s is dirty. Skipping', name)
+            return DIRTY
+
+        if repo.head.is_detached:
+            return NO_UPSTREAM
+        upstream = repo.active_branch.tracking_branch()
+        if upstream is None:
+            return NO_UPSTREAM
+
+        head = repo.head.commit
+        if head == upstream.commit:
+            return UP_TO_DATE
+        if repo.is_ancestor(upstream.commit, head):
+            # Unpushed commits, nothing to fetch
+            return AHEAD
+        if not repo.is_ancestor(head, upstream.commit):
+            self.app.LOG.warning('Branch of %s has diverged. Skipping', name)
+            return DIVERGED
+
+        try:
+            repo.git.merge('--ff-only', '--quiet', upstream.name)
+        except GitCommandError as e:
+            self.app.LOG.error('Error updating %s: %s', name, e.stderr.strip())
+            return FAILED
+        self.app.LOG.info('Updated %s', name)
+        return UPDATED
+
+    def _report(self, statuses: dict[str, str], elapsed: float) -> None:
+        counts = Counter(statuses.values())
+        rate = len(statuses) / elapsed if elapsed else 0
+        self.app.LOG.info(
+            '%s repos in %.1fs (%.1f repos/s): %s',
+            len(statuses),
+            elapsed,
+            rate,
+            ', '.join(f'{count} {status}' for status, count in sorted(counts.items())),
+        )
+        for status in (DIRTY, DIVERGED, FAILED):
+            names = sorted(name for name, value in statuses.items() if value == status)
+            if names:
+                self.app.LOG.warning('%s: %s', status.capitalize(), ', '.join(names))
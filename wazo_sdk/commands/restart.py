@@ -1,12 +1,15 @@
-# Copyright 2018-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2018-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0+
 
+from __future__ import annotations
+
 from argparse import ArgumentParser, Namespace
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from cliff.command import Command
 
-from wazo_sdk.service import ServiceManager
+if TYPE_CHECKING:
+    from wazo_sdk.service import ServiceManager
 
 
 class Restart(Command):
@@ -20,5 +23,10 @@ class Restart(Command):
         return parser
 
     def take_action(self, parsed_args: Namespace) -> None:
-        for service_name in parsed_args.services:
-            self.service.restart(service_name)
+        for result in self.service.restart(parsed_args.services):
+            if result['success']:
+                self.app.LOG.info(
+                    '%s restarted in %.2fs', result['service'], result['duration']
+                )
+            else:
+                self.app.LOG.error('%s failed to restart', result['service'])
@@ -1,25 +1,85 @@
-# Copyright 2019-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2019-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0+
 
 from __future__ import annotations
 
-from argparse import ArgumentParser, Namespace
-from typing import Any
+import re
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from typing import TYPE_CHECKING, Any
 
 from cliff.command import Command
 
-from wazo_sdk.service import ServiceManager
+from wazo_sdk.remote.follow import LEVELS
+
+if TYPE_CHECKING:
+    from wazo_sdk.service import ServiceManager
+
+
+def pattern_argument(value: str) -> str:
+    """A regular expression, checked here rather than failing on the Wazo"""
+    try:
+        re.compile(value.encode())
+    except re.error as e:
+        raise ArgumentTypeError(f'invalid regular expression {value!r}: {e}')
+    return value
 
 
 class Tailf(Command):
-    """watch the log output for a given service"""
+    """watch the log output for one or more services"""
 
     service: ServiceManager
 
     def get_parser(self, *args: Any, **kwargs: Any) -> ArgumentParser:
         parser = super().get_parser(*args, **kwargs)
-        parser.add_argument('service', help='services to restart')
+        parser.add_argument('services', nargs='+', help='services to watch')
+        parser.add_argument(
+            '--lines',
+            '-n',
+            type=int,
+            default=10,
+            help='number of existing lines shown for each service',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='start after the last line printed by the previous tailf of these logs',
+        )
+        parser.add_argument(
+            '--grep',
+            '-g',
+            dest='pattern',
+            type=pattern_argument,
+            default=None,
+            help='only show lines matching this regular expression',
+        )
+        parser.add_argument(
+            '--level',
+            '-l',
+            choices=list(LEVELS),
+            type=str.upper,
+            default=None,
+            help='only show lines of this level or above',
+        )
+        parser.add_argument(
+            '--color',
+            action='store_true',
+            default=None,
+            help='colour the service names even when not on a terminal',
+        )
+        parser.add_argument(
+            '--no-color',
+            dest='color',
+            action='store_false',
+            help='do not colour the service names',
+        )
         return parser
 
     def take_action(self, parsed_args: Namespace) -> None:
-        self.service.tailf(parsed_args.service)
+        self.service.tailf(
+            parsed_args.services,
+            lines=parsed_args.lines,
+            pattern=parsed_args.pattern,
+            level=parsed_args.level,
+            color=parsed_args.color,
+            resume=parsed_args.resume,
+        )
@@ -3,17 +3,32 @@
 
 from __future__ import annotations
 
+import hashlib
 import os
+import pickle
+import tempfile
 from argparse import Namespace
-from typing import TYPE_CHECKING, Any
-
-import yaml
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, TypeVar
 
 _DEFAULT_PROJECT_FILENAME = '~/.config/wdk/project.yml'
 _DEFAULT_CACHE_DIR = '~/.local/cache/wdk'
-_DEFAULT_STATE_FILENAME = 'state'
+_DEFAULT_STATE_FILENAME = 'state.db'
+_LEGACY_STATE_FILENAME = 'state'
 REPO_PREFIX = ['', 'wazo-', 'xivo-']
 DEFAULT_INIT_PACKAGES = ['python3-pip', 'rsync']
+_DEFAULT_SSH_CONTROL_PERSIST = 60
+_DEFAULT_MOUNT_JOBS = 4
+_DEFAULT_SYNC_TIMEOUT = 120
+_DEFAULT_CLONE_JOBS = 4
+_DEFAULT_GITHUB_API_URL = 'https://api.github.com'
+SYNC_ENGINE_LSYNCD = 'lsyncd'
+SYNC_ENGINE_WDK = 'wdk'
+_COMPILED_DIRNAME = 'compiled'
+# Bumped when the content of the compiled files changes
+_COMPILED_VERSION = 2
+
+_T = TypeVar('_T')
 
 if TYPE_CHECKING:
     from typing import TypedDict
@@ -29,10 +44,18 @@ if TYPE_CHECKING:
         cache_dir: str
         archive_dir: str
         rsync_only: bool
-        github_username: str | None
         github_token: str | None
         github_orgs: list[str]
+        github_api_url: str
         init: InitConfigData
+        ssh_control_persist: int
+        mount_jobs: int
+        sync_timeout: int
+        sync_engine: str
+        clone_jobs: int
+        clone_filter: str | None
+        clone_reference: str | None
+        archive_clone_depth: int | None
 
     class ProjectConfigData(TypedDict):
         python2: bool
@@ -47,7 +70,7 @@ class Config:
     def __init__(self, args: Namespace) -> None:
         self._args = args
         self._file_config = self._read_config_file()
-        self._project_config = self._read_project_file()
+        self._project_config, self._project_index = self._read_project_file()
 
     @property
     def cache_dir(self) -> str:
@@ -84,6 +107,10 @@ class Config:
     def state_file_path(self) -> str:
         return os.path.join(self.cache_dir, _DEFAULT_STATE_FILENAME)
 
+    @property
+    def legacy_state_file_path(self) -> str:
+        return os.path.join(self.cache_dir, _LEGACY_STATE_FILENAME)
+
     @property
     def project_file(self) -> str:
         return os.path.expanduser(
@@ -102,35 +129,160 @@ class Config:
         return self._file_config.get('github_token')
 
     @property
-    def github_username(self) -> str | None:
-        return self._file_config.get('github_username')
+    def github_api_url(self) -> str:
+        return self._file_config.get('github_api_url', _DEFAULT_GITHUB_API_URL)
 
     @property
     def init_packages(self) -> list[str]:
         return self._file_config.get('init', {}).get('packages', DEFAULT_INIT_PACKAGES)
 
+    @property
+    def ssh_control_persist(self) -> int:
+        return self._file_config.get(
+            'ssh_control_persist', _DEFAULT_SSH_CONTROL_PERSIST
+        )
+
+    @property
+    def mount_jobs(self) -> int:
+        return self._file_config.get('mount_jobs', _DEFAULT_MOUNT_JOBS)
+
+    @property
+    def sync_timeout(self) -> int:
+        return self._file_config.get('sync_timeout', _DEFAULT_SYNC_TIMEOUT)
+
+    @property
+    def sync_engine(self) -> str:
+        return self._file_config.get('sync_engine', SYNC_ENGINE_LSYNCD)
+
+    @property
+    def clone_jobs(self) -> int:
+        return self._file_config.get('clone_jobs', _DEFAULT_CLONE_JOBS)
+
+    @property
+    def clone_filter(self) -> str | None:
+        return self._file_config.get('clone_filter')
+
+    @property
+    def clone_reference(self) -> str | None:
+        reference = self._file_config.get('clone_reference')
+        return os.path.expanduser(reference) if reference else None
+
+    @property
+    def archive_clone_depth(self) -> int | None:
+        return self._file_config.get('archive_clone_depth')
+
     def get_project(self, short_name: str) -> ProjectConfigData:
         name = self.get_project_name(short_name)
         return self._project_config[name]
 
     def get_project_name(self, short_name: str) -> str:
-        for prefix in REPO_PREFIX:
-            name = f'{prefix}{short_name}'
-            if name in self._project_config:
-                return name
+        name = self._project_index.get(short_name)
+        if not name:
+            raise Exception(f'No such project {short_name}')
+        return name
 
-        raise Exception(f'No such project {short_name}')
+    def log_projects(self) -> list[str]:
+        """Projects with a log_filename"""
+        return sorted(
+            name
+            for name, project in self._project_config.items()
+            if project and project.get('log_filename')
+        )
 
     def _read_config_file(self) -> ConfigData:
         filename = os.path.expanduser(self._args.config)
-        return self._read_yml_file(filename)  # type: ignore
+        # cache_dir is read from this file, so its compiled copy can only be in
+        # the default one: it is not kept when another cache_dir is configured
+        default_dir = os.path.abspath(os.path.expanduser(_DEFAULT_CACHE_DIR))
+
+        def uses_default_dir(config: dict[str, Any] | None) -> bool:
+            cache_dir = (config or {}).get('cache_dir', _DEFAULT_CACHE_DIR)
+            return os.path.abspath(os.path.expanduser(cache_dir)) == default_dir
+
+        config = self._read_compiled(
+            filename,
+            os.path.join(default_dir, _COMPILED_DIRNAME),
+            self._read_yml_file,
+            keep=uses_default_dir,
+        )
+        return config or {}  # type: ignore
+
+    def _read_project_file(
+        self,
+    ) -> tuple[dict[str, ProjectConfigData], dict[str, str]]:
+        """Returns the projects and the index of their short names"""
+        compiled_dir = os.path.join(self.cache_dir, _COMPILED_DIRNAME)
+        compiled = self._read_compiled(
+            self.project_file, compiled_dir, self._compile_projects
+        )
+        return compiled or ({}, {})
 
-    def _read_project_file(self) -> dict[str, ProjectConfigData]:
-        return self._read_yml_file(self.project_file)
+    def _compile_projects(
+        self, filename: str
+    ) -> tuple[dict[str, ProjectConfigData], dict[str, str]]:
+        projects = self._read_yml_file(filename) or {}
+        return projects, self._index_projects(projects)
+
+    def _read_compiled(
+        self,
+        filename: str,
+        compiled_dir: str,
+        build: Callable[[str], _T],
+        keep: Callable[[_T], bool] | None = None,
+    ) -> _T | None:
+        """Returns the compiled content of a file, compiling it if it changed
+
+        The compiled content is only written when keep accepts it.
+        """
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return None
+
+        key = (_COMPILED_VERSION, filename, stat.st_mtime_ns, stat.st_size)
+        compiled_path = os.path.join(
+            compiled_dir, f'{hashlib.sha1(filename.encode()).hexdigest()}.pickle'
+        )
+        try:
+            with open(compiled_path, 'rb') as f:
+                compiled_key, content = pickle.load(f)
+            if compiled_key == key:
+                return content
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+            pass
+
+        content = build(filename)
+        if keep and not keep(content):
+            return content
+        try:
+            os.makedirs(compiled_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=compiled_dir, delete=False) as tmp:
+                pickle.dump((key, content), tmp, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp.name, compiled_path)
+        except OSError:
+            pass
+        return content
+
+    def _index_projects(self, projects: dict[str, Any]) -> dict[str, str]:
+        # The first prefix of REPO_PREFIX matching a project wins
+        index: dict[str, str] = {}
+        for prefix in REPO_PREFIX:
+            for name in projects:
+                if name.startswith(prefix) and len(name) > len(prefix):
+                    index.setdefault(name[len(prefix) :], name)
+        return index
 
     def _read_yml_file(self, filename: str) -> dict[str, Any]:
+        # Only imported when a file changed
+        import yaml
+
+        try:
+            from yaml import CSafeLoader as Loader
+        except ImportError:
+            from yaml import SafeLoader as Loader  # type: ignore
+
         try:
             with open(filename) as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=Loader)
         except OSError:
             return {}
@@ -0,0 +1,131 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+if TYPE_CHECKING:
+    from typing import TypedDict
+
+    class GitHubRepo(TypedDict):
+        name: str
+        archived: bool
+        ssh_url: str
+        pushed_at: str | None
+
+    class CachedPage(TypedDict):
+        etag: str
+        next: str | None
+        repos: list[GitHubRepo]
+
+
+_PER_PAGE = 100
+_TIMEOUT = 30
+_NEXT_LINK = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+
+class GitHubError(Exception):
+    pass
+
+
+class GitHubListing:
+    """Repositories of GitHub organisations, cached on disk
+
+    Each page of a listing is kept with its ETag and revalidated with
+    If-None-Match, so an unchanged listing costs one 304 response per page,
+    which GitHub does not count against the rate limit.
+    """
+
+    def __init__(self, cache_dir: str, token: str, api_url: str) -> None:
+        self._cache_dir = cache_dir
+        self._token = token
+        self._api_url = api_url.rstrip('/')
+        self._lock = threading.Lock()
+        self.fetched = 0
+        self.not_modified = 0
+
+    def repositories(self, orgs: list[str]) -> list[GitHubRepo]:
+        """Repositories of all the organisations, listed concurrently"""
+        with ThreadPoolExecutor(max_workers=len(orgs) or 1) as executor:
+            listings = list(executor.map(self.org_repositories, orgs))
+        return [repo for listing in listings for repo in listing]
+
+    def org_repositories(self, org: str) -> list[GitHubRepo]:
+        cache = self._load(org)
+        pages: dict[str, CachedPage] = {}
+        url: str | None = (
+            f'{self._api_url}/orgs/{org}/repos?type=all&per_page={_PER_PAGE}'
+        )
+        while url:
+            page = self._get_page(url, cache.get(url))
+            pages[url] = page
+            url = page['next']
+
+        # Pages that are no longer reached are dropped
+        self._save(org, pages)
+        return [repo for page in pages.values() for repo in page['repos']]
+
+    def _get_page(self, url: str, cached: CachedPage | None) -> CachedPage:
+        headers = {
+            'Accept': 'application/vnd.github+json',
+            'Authorization': f'Bearer {self._token}',
+        }
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+
+        try:
+            with urlopen(Request(url, headers=headers), timeout=_TIMEOUT) as response:
+                body = json.load(response)
+                etag = response.headers.get('ETag', '')
+                link = response.headers.get('Link', '')
+        except HTTPError as e:
+            if e.code == 304 and cached:
+                with self._lock:
+                    self.not_modified += 1
+                return cached
+            raise GitHubError(f'{url}: {e.code} {e.reason}') from e
+
+        with self._lock:
+            self.fetched += 1
+        match = _NEXT_LINK.search(link)
+        return {
+            'etag': etag,
+            'next': match.group(1) if match else None,
+            'repos': [_to_repo(repo) for repo in body],
+        }
+
+    def _cache_file(self, org: str) -> str:
+        return os.path.join(self._cache_dir, f'{org}.json')
+
+    def _load(self, org: str) -> dict[str, CachedPage]:
+        try:
+            with open(self._cache_file(org)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, org: str, pages: dict[str, CachedPage]) -> None:
+        os.makedirs(self._cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            mode='w', dir=self._cache_dir, delete=False
+        ) as f:
+            json.dump(pages, f)
+        os.replace(f.name, self._cache_file(org))
+
+
+def _to_repo(data: dict[str, Any]) -> GitHubRepo:
+    return {
+        'name': data['name'],
+        'archived': data['archived'],
+        'ssh_url': data['ssh_url'],
+        'pushed_at': data.get('pushed_at'),
+    }
@@ -0,0 +1,88 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+from typing import NamedTuple
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+_EVENT_HEADER = struct.Struct('iIII')
+_READ_SIZE = 64 * 1024
+
+
+class Event(NamedTuple):
+    wd: int
+    mask: int
+    cookie: int
+    name: str
+
+
+class Inotify:
+    """Minimal binding of the Linux inotify API"""
+
+    def __init__(self) -> None:
+        library = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(library, use_errno=True)
+        self._fd = self._check(self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC))
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def add_watch(self, path: str, mask: int) -> int:
+        return self._check(
+            self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        )
+
+    def rm_watch(self, wd: int) -> None:
+        try:
+            self._check(self._libc.inotify_rm_watch(self._fd, wd))
+        except OSError:
+            # The watch is already gone with its directory
+            pass
+
+    def read(self) -> list[Event]:
+        try:
+            data = os.read(self._fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b'\0')
+            offset += length
+            events.append(Event(wd, mask, cookie, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def _check(self, result: int) -> int:
+        if result < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error or errno.EIO))
+        return result
@@ -0,0 +1,227 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+from __future__ import annotations
+
+import datetime
+import gzip
+import json
+import os
+import tempfile
+from collections.abc import Iterator
+from typing import TYPE_CHECKING
+
+from wazo_sdk.remote.follow import LEVELS, LineFilter, highest_level, line_level
+from wazo_sdk.remote.slice import line_time
+
+if TYPE_CHECKING:
+    from typing import TypedDict
+
+    class Block(TypedDict):
+        # Where the compressed block is in the archive
+        offset: int
+        length: int
+        lines: int
+        # Timestamps of the first and last lines, "YYYY-MM-DD HH:MM:SS"
+        first: str | None
+        last: str | None
+        # Highest level of the lines, continuation lines included, or named
+        # further in a line: only used to skip the blocks below a level
+        level: str | None
+        # Level continued by the lines without a level at the start of the next block
+        last_level: str | None
+        # Last change of the remote file, the year of its syslog dates
+        mtime: str
+
+    class ArchiveIndex(TypedDict):
+        format: str
+        # Position reached in the remote log file
+        inode: int | None
+        offset: int
+        blocks: list[Block]
+
+
+ZSTD = 'zstd'
+GZIP = 'gzip'
+_EXTENSIONS = {ZSTD: 'zst', GZIP: 'gz'}
+# Uncompressed size of a block, the unit read by a search
+_BLOCK_SIZE = 1048576
+# Margin for a clock changed after a line was written
+_CLOCK_MARGIN = datetime.timedelta(days=1)
+
+
+def _zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _line_time(line: bytes, mtime: datetime.datetime) -> datetime.datetime | None:
+    """syslog dates have no year: one after the file last changed is of the year before"""
+    time = line_time(line, mtime.year)
+    if time and time > mtime + _CLOCK_MARGIN:
+        return line_time(line, mtime.year - 1)
+    return time
+
+
+def _block_mtime(block: Block) -> datetime.datetime:
+    # Not in the blocks of the first archives
+    if 'mtime' not in block:
+        return datetime.datetime.now()
+    return datetime.datetime.fromisoformat(block['mtime'])
+
+
+def _compress(data: bytes, format: str) -> bytes:
+    if format == ZSTD:
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, format: str) -> bytes:
+    if format == ZSTD:
+        import zstandard
+
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+class LogArchive:
+    """A log file kept locally, appended to in independently compressed blocks
+
+    The sidecar index has the time range and the highest level of each
+    block, so a search only decompresses the blocks it needs. Blocks are
+    zstd frames when the zstandard module is installed, gzip members
+    otherwise, so the archive is also readable with zstdcat or zcat.
+    """
+
+    def __init__(self, directory: str, name: str) -> None:
+        self._directory = directory
+        self._index_path = os.path.join(directory, f'{name}.index.json')
+        self.index = self._load_index()
+        extension = _EXTENSIONS[self.index['format']]
+        self.path = os.path.join(directory, f'{name}.{extension}')
+        blocks = self.index['blocks']
+        # Level of the last line with a level, for the lines continuing it
+        self._level = blocks[-1].get('last_level') if blocks else None
+
+    def append(self, data: bytes, inode: int | None, offset: int, mtime: str) -> None:
+        """Adds complete lines and saves the position reached in the remote file
+
+        mtime is the last change of the file the lines were read from, in the
+        time of the host.
+        """
+        os.makedirs(self._directory, exist_ok=True)
+        with open(self.path, 'ab') as archive:
+            position = archive.tell()
+            start = 0
+            while start < len(data):
+                end = data.rfind(b'\n', start, start + _BLOCK_SIZE) + 1
+                if end <= start:
+                    # A line longer than a block
+                    end = data.find(b'\n', start + _BLOCK_SIZE) + 1 or len(data)
+                block = data[start:end]
+                compressed = _compress(block, self.index['format'])
+                archive.write(compressed)
+                self.index['blocks'].append(
+                    self._describe(block, position, len(compressed), mtime)
+                )
+                position += len(compressed)
+                start = end
+        self.index['inode'] = inode
+        self.index['offset'] = offset
+        self._save_index()
+
+    def search(
+        self,
+        since: str | None = None,
+        until: str | None = None,
+        level: str | None = None,
+        pattern: str | None = None,
+    ) -> Iterator[bytes]:
+        """Lines between two "YYYY-MM-DD HH:MM:SS", of a level or above, matching"""
+        min_level = LEVELS[level] if level else 0
+        line_filter = LineFilter(pattern, level)
+        with open(self.path, 'rb') as archive:
+            for block in self.index['blocks']:
+                if until and block['first'] and block['first'] > until:
+                    break
+                if (since and block['last'] and block['last'] < since) or (
+                    min_level and LEVELS.get(block['level'] or '', 0) < min_level
+                ):
+                    # The lines without a level of the next block continue it
+                    line_filter.reset(block.get('last_level'))
+                    continue
+
+                archive.seek(block['offset'])
+                data = _decompress(archive.read(block['length']), self.index['format'])
+                mtime = _block_mtime(block)
+                time = block['first']
+                for line in data.splitlines(keepends=True):
+                    timestamp = _line_time(line, mtime)
+                    if timestamp:
+                        time = timestamp.isoformat(' ')
+                    # Every line goes through the filter, for the lines continuing it
+                    keep = line_filter(line.rstrip(b'\n'))
+                    if since and time and time < since:
+                        continue
+                    if until and time and time > until:
+                        return
+                    if keep:
+                        yield line
+
+    def _describe(self, block: bytes, offset: int, length: int, mtime: str) -> Block:
+        lines = block.splitlines()
+        changed = datetime.datetime.fromisoformat(mtime)
+        first = last = None
+        for line in lines:
+            if timestamp := _line_time(line, changed):
+                first = timestamp.isoformat(' ')
+                break
+        for line in reversed(lines):
+            if timestamp := _line_time(line, changed):
+                last = timestamp.isoformat(' ')
+                break
+
+        # Lines at the start of a block may continue the last line before it
+        levels = [self._level, highest_level(block)]
+        for line in reversed(lines):
+            if level := line_level(line):
+                self._level = level
+                break
+        return {
+            'offset': offset,
+            'length': length,
+            'lines': len(lines),
+            'first': first,
+            'last': last,
+            'level': max(
+                (level for level in levels if level),
+                key=LEVELS.__getitem__,
+                default=None,
+            ),
+            'last_level': self._level,
+            'mtime': mtime,
+        }
+
+    def _load_index(self) -> ArchiveIndex:
+        try:
+            with open(self._index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {
+                'format': ZSTD if _zstd_available() else GZIP,
+                'inode': None,
+                'offset': 0,
+                'blocks': [],
+            }
+
+    def _save_index(self) -> None:
+        with tempfile.NamedTemporaryFile(
+            mode='w', dir=self._directory, delete=False
+        ) as f:
+            json.dump(self.index, f)
+        os.replace(f.name, self._index_path)
@@ -0,0 +1,181 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+from __future__ import annotations
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from logging import Logger
+from typing import TYPE_CHECKING, Any
+
+from wazo_sdk import remote
+
+if TYPE_CHECKING:
+    from typing import TypedDict
+
+    from wazo_sdk.ssh import SSHSession
+
+    class FilePosition(TypedDict):
+        inode: int
+        offset: int
+
+
+_COLORS = ['36', '33', '35', '32', '34', '31', '96', '93']
+_READ_SIZE = 65536
+# Exit code of ssh when the connection failed or dropped
+_SSH_ERROR = 255
+_MIN_BACKOFF = 1.0
+_MAX_BACKOFF = 30.0
+# Positions are saved at most this often while lines are coming
+_SAVE_INTERVAL = 1.0
+
+
+class LogFollower:
+    """Follows log files of a host, reconnecting when the connection drops
+
+    The host reports the inode and offset reached in each file after the lines
+    it sends. Lines are only printed with the position that follows them, and
+    positions are saved in a file, so a new connection resumes after the last
+    line printed, from the rotated file first when the log was rotated.
+    """
+
+    def __init__(
+        self,
+        logger: Logger,
+        ssh: SSHSession,
+        files: list[str],
+        prefixes: list[str],
+        positions_file: str,
+    ) -> None:
+        self.logger = logger
+        self._ssh = ssh
+        self._files = files
+        self._prefixes = prefixes
+        self._positions_file = positions_file
+        self._positions: dict[str, FilePosition] = {}
+        # Lines of each file received without the position following them yet
+        self._held: dict[int, list[str]] = {}
+        self._saved_at = 0.0
+
+    def run(self, args: dict[str, Any], resume: bool = False) -> None:
+        """args are given to the remote follower, resume starts from the saved positions"""
+        if resume:
+            self._positions = {
+                path: position
+                for path, position in self._load().items()
+                if path in self._files
+            }
+
+        # Positions are saved when stopped by timeout or kill as well
+        previous_handler = signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        backoff = _MIN_BACKOFF
+        try:
+            while True:
+                args = dict(args, positions=self._positions)
+                if self._follow(args):
+                    backoff = _MIN_BACKOFF
+                    # The host sent the starting positions first: the files
+                    # without one did not exist yet, all their lines are new
+                    args['lines'] = None
+                self.logger.warning(
+                    'Connection to %s lost, reconnecting in %ss',
+                    self._ssh.hostname,
+                    backoff,
+                )
+                time.sleep(backoff)
+                backoff = min(backoff * 2, _MAX_BACKOFF)
+        finally:
+            signal.signal(signal.SIGTERM, previous_handler)
+            self._save()
+
+    def _follow(self, args: dict[str, Any]) -> bool:
+        """Prints lines until the connection drops, returns whether any came
+
+        Other failures of the remote follower are raised instead of retried.
+        """
+        # The follower exits when its standard input is closed
+        process = self._ssh.popen(
+            remote.command('follow', args),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        received = False
+        # They are sent again from the last position
+        self._held = {}
+        try:
+            partial = b''
+            while chunk := os.read(process.stdout.fileno(), _READ_SIZE):  # type: ignore
+                received = True
+                *lines, partial = (partial + chunk).split(b'\n')
+                self._print(lines)
+            returncode = process.wait()
+        finally:
+            if process.poll() is None:
+                process.terminate()
+                process.wait()
+        # Negative when ssh was killed by a signal
+        if returncode > 0 and returncode != _SSH_ERROR:
+            raise Exception(
+                f'Failed to follow the logs on {self._ssh.hostname}: exit code {returncode}'
+            )
+        return received
+
+    def _print(self, lines: list[bytes]) -> None:
+        """Prints the lines followed by their position, then saves the positions"""
+        output = []
+        moved = False
+        for line in lines:
+            if line.startswith(b'#'):
+                index, inode, offset = (int(value) for value in line[1:].split())
+                path = self._files[index]
+                self._positions[path] = {'inode': inode, 'offset': offset}
+                output.extend(self._held.pop(index, []))
+                moved = True
+                continue
+            file_index, _, text = line.partition(b' ')
+            self._held.setdefault(int(file_index), []).append(
+                f'{self._prefixes[int(file_index)]}{text.decode(errors="replace")}\n'
+            )
+        sys.stdout.write(''.join(output))
+        sys.stdout.flush()
+
+        if moved and time.monotonic() - self._saved_at > _SAVE_INTERVAL:
+            self._save()
+
+    def _load(self) -> dict[str, FilePosition]:
+        try:
+            with open(self._positions_file) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self) -> None:
+        if not self._positions:
+            return
+        # Other files of the host may be followed by another wdk
+        positions = dict(self._load(), **self._positions)
+        directory = os.path.dirname(self._positions_file)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(mode='w', dir=directory, delete=False) as f:
+            json.dump(positions, f)
+        os.replace(f.name, self._positions_file)
+        self._saved_at = time.monotonic()
+
+
+def prefixes(names: list[str], color: bool) -> list[str]:
+    """Service name prefixes, none for a single service"""
+    if len(names) == 1:
+        return ['']
+    width = max(len(name) for name in names)
+    prefixes = []
+    for index, name in enumerate(names):
+        prefix = f'{name:<{width}} | '
+        if color:
+            prefix = f'\033[{_COLORS[index % len(_COLORS)]}m{prefix}\033[0m'
+        prefixes.append(prefix)
+    return prefixes
@@ -7,26 +7,37 @@ import os
 import pathlib
 import sys
 from argparse import ArgumentParser
-from typing import Any
+from functools import cached_property
+from typing import TYPE_CHECKING, Any
 
 from cliff.app import App
 from cliff.command import Command
 from cliff.commandmanager import CommandManager
 
 from wazo_sdk.config import Config
-from wazo_sdk.mount import Mounter
-from wazo_sdk.service import ServiceManager
-from wazo_sdk.state import State
+
+if TYPE_CHECKING:
+    from wazo_sdk.mount import Mounter
+    from wazo_sdk.service import ServiceManager
+    from wazo_sdk.ssh import SSHSessionManager
+    from wazo_sdk.state import State
 
 _DEFAULT_CONFIG_FILENAME = os.path.expanduser('~/.config/wdk/config.yml')
 _DEFAULT_CONFIG_FILENAME = os.getenv('WDK_CONFIG_FILE', _DEFAULT_CONFIG_FILENAME)
 
 
+# Attributes set on a command when it declares them, and the property of
+# WDK creating their value
+_INJECTED = {
+    'config': 'config',
+    'mounter': 'mounter',
+    'service': 'service_manager',
+    'ssh': 'ssh',
+}
+
+
 class WDK(App):
     config: Config
-    state: State
-    _service_manager: ServiceManager
-    _mounter: Mounter
 
     def __init__(self) -> None:
         super().__init__(
@@ -58,26 +69,53 @@ class WDK(App):
 
         self._create_cache_dir(self.config.cache_dir)
 
-        try:
-            with open(self.config.state_file_path) as f:
-                self.state = State.from_file(f)
-        except OSError:
-            self.state = State()
+    # Everything else is created on first use, most commands need little of it
+    @cached_property
+    def state(self) -> State:
+        from wazo_sdk.state import State
+
+        return State.open(
+            self.config.state_file_path, self.config.legacy_state_file_path
+        )
+
+    @cached_property
+    def ssh(self) -> SSHSessionManager:
+        from wazo_sdk.ssh import SSHSessionManager
+
+        return SSHSessionManager(self.LOG, self.config)
+
+    @cached_property
+    def service_manager(self) -> ServiceManager:
+        from wazo_sdk.service import ServiceManager
+
+        return ServiceManager(self.LOG, self.config, self.ssh)
+
+    @cached_property
+    def mounter(self) -> Mounter:
+        from wazo_sdk.mount import Mounter
 
-        self._service_manager = ServiceManager(self.LOG, self.config)
-        self._mounter = Mounter(self.LOG, self.config, self.state)
+        return Mounter(self.LOG, self.config, self.state, self.ssh)
 
     def prepare_to_run_command(self, cmd: Command) -> None:
-        cmd.config = self.config
-        cmd.mounter = self._mounter
-        cmd.service = self._service_manager
+        declared = {
+            name
+            for klass in type(cmd).__mro__
+            for name in getattr(klass, '__annotations__', {})
+        }
+        for name, attribute in _INJECTED.items():
+            if name in declared:
+                setattr(cmd, name, getattr(self, attribute))
 
     def clean_up(self, cmd: Command, result: int, err: Exception | None) -> None:
+        if 'ssh' in self.__dict__:
+            self.ssh.report()
         if err:
             return
 
-        with open(self.config.state_file_path, 'w') as f:
-            self.state.to_file(f)
+        # Edits are silently lost while a sync process is dead. Only the commands
+        # using the mounts check it, the others must not ssh to the hosts for it
+        if 'mounter' in self.__dict__:
+            self.mounter.supervise()
 
         self._remove_stale_config_files()
 
@@ -94,7 +132,7 @@ class WDK(App):
                 continue
 
             path = os.path.join(self.config.cache_dir, f)
-            if path == self.config.state_file_path:
+            if path.startswith(self.config.state_file_path) or os.path.isdir(path):
                 continue
 
             self.LOG.debug('remove stale config file: %s', path)
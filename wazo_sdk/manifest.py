@@ -0,0 +1,65 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+
+EXCLUDED_DIRS = {'.git', '.tox', 'node_modules'}
+
+
+class Manifest:
+    """Size and modification time of every file of a repository
+
+    Comparing two manifests gives the files that need to be transferred
+    without walking the remote copy.
+    """
+
+    def __init__(self, destination: str, entries: dict[str, list[int]]) -> None:
+        self.destination = destination
+        self.entries = entries
+
+    @classmethod
+    def scan(cls, root: str, destination: str) -> Manifest:
+        entries: dict[str, list[int]] = {}
+        pending = ['']
+        while pending:
+            relative_dir = pending.pop()
+            with os.scandir(os.path.join(root, relative_dir)) as it:
+                for entry in it:
+                    path = os.path.join(relative_dir, entry.name)
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in EXCLUDED_DIRS:
+                            pending.append(path)
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    entries[path] = [stat.st_size, stat.st_mtime_ns]
+        return cls(destination, entries)
+
+    @classmethod
+    def load(cls, filename: str) -> Manifest | None:
+        try:
+            with open(filename) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls(data['destination'], data['entries'])
+
+    def save(self, filename: str) -> None:
+        directory = os.path.dirname(filename)
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(mode='w', dir=directory, delete=False) as f:
+            json.dump({'destination': self.destination, 'entries': self.entries}, f)
+        os.replace(f.name, filename)
+
+    def diff(self, previous: Manifest) -> tuple[list[str], list[str]]:
+        """Returns the changed and the deleted files since the previous manifest"""
+        changed = [
+            path
+            for path, entry in self.entries.items()
+            if previous.entries.get(path) != entry
+        ]
+        deleted = [path for path in previous.entries if path not in self.entries]
+        return changed, deleted
@@ -3,44 +3,29 @@
 
 from __future__ import annotations
 
+import hashlib
 import os
-import shlex
 import signal
 import subprocess
-import tempfile
 from collections.abc import Generator
 from logging import Logger
-from typing import TYPE_CHECKING, Any
-
-import psutil
-import sh
-from jinja2 import Template
+from typing import TYPE_CHECKING
 
 from wazo_sdk.config import Config
-from wazo_sdk.state import State
+from wazo_sdk.manifest import Manifest
+from wazo_sdk.mount_plan import MountPlan
+from wazo_sdk.sync import SyncStatus, SyncSupervisor
 
 if TYPE_CHECKING:
     from wazo_sdk.config import ProjectConfigData
-    from wazo_sdk.state import MountData
+    from wazo_sdk.ssh import SSHSessionManager
+    from wazo_sdk.state import MountData, State
 
 
 REPO_PREFIX = ['', 'wazo-', 'xivo-']
-LSYNC_CONFIG_TEMPLATE = Template(
-    '''\
-sync {
-    default.rsync,
-    delay = 1,
-    source = "{{ source }}",
-    target = "{{ host }}:{{ destination }}",
-    exclude = {'.git', '.tox', 'node_modules'},
-    rsync = {
-        xattrs = true,
-        archive = true,
-        perms = true
-    }
-}
-'''
-)
+
+# Files a development install depends on, entry points included
+PACKAGING_FILES = ['setup.py', 'setup.cfg', 'pyproject.toml']
 
 RSYNC_OPTIONS = [
     '--xattrs',
@@ -50,31 +35,31 @@ RSYNC_OPTIONS = [
     "--exclude={'.git','.tox','node_modules'}",
 ]
 
+# Only the listed files are transferred, files missing locally are deleted
+RSYNC_DELTA_OPTIONS = [
+    '--xattrs',
+    '--archive',
+    '--perms',
+    '--from0',
+    '--files-from=-',
+    '--delete-missing-args',
+]
 
-def _list_processes() -> Generator[tuple[int, str], None, None]:
-    for pid in psutil.pids():
-        try:
-            with open(
-                os.path.join(
-                    '/proc',
-                    str(pid),
-                    'cmdline',
-                ),
-            ) as f:
-                yield pid, f.read()[:-1]
-        except OSError:
-            # Process already completed
-            pass
+_MANIFEST_DIRNAME = 'manifests'
 
 
 class Mounter:
-    def __init__(self, logger: Logger, config: Config, state: State) -> None:
+    def __init__(
+        self, logger: Logger, config: Config, state: State, ssh: SSHSessionManager
+    ) -> None:
         self.logger = logger
         self._config = config
         self._hostname: str = config.hostname  # type: ignore
         self._local_dir: str = config.local_source
         self._remote_dir: str = config.remote_source  # type: ignore
         self._state = state
+        self._ssh = ssh
+        self._supervisor = SyncSupervisor(logger, config, ssh)
 
     def list_(self) -> Generator[tuple[str, bool], None, None]:
         mounts = self._state.get_mounts(self._hostname)
@@ -83,26 +68,20 @@ class Mounter:
                 continue
             yield mount['project'], self._is_sync_running(mount)
 
+    def supervise(self) -> list[SyncStatus]:
+        """Restarts the sync processes that died, on every host"""
+        if self._config.rsync_only:
+            return []
+        return list(self._supervisor.check().values())
+
     def _is_sync_running(self, mount: MountData) -> bool:
         if self._config.rsync_only:
             return True
 
-        pid_filename: str = mount['lsync_pidfile']  # type: ignore
-        try:
-            with open(pid_filename) as f:
-                pid = int(f.read())
-        except OSError:
-            return False
-
-        if pid not in psutil.pids():
-            return False
-
-        try:
-            with open(os.path.join('/proc', str(pid), 'status')) as f:
-                _, cmd = f.readline().strip().rsplit('\t', 1)
-                return cmd == 'lsyncd'
-        except OSError:
+        engine = mount.get('sync_engine')
+        if not engine:
             return False
+        return self._supervisor.is_running(self._hostname, engine)
 
     def _is_mounted(self, repo_name: str) -> bool:
         return self._state.is_mounted(self._hostname, repo_name)
@@ -113,7 +92,7 @@ class Mounter:
             return False
         return self._is_sync_running(mount)
 
-    def mount(self, repo_name: str) -> None:
+    def mount(self, repo_name: str, force: bool = False) -> None:
         if not self._hostname:
             raise Exception('The remote hostname is required to mount directories')
 
@@ -127,15 +106,26 @@ class Mounter:
 
         # Skip this condition if we are in rsync only mode,
         # because files a not synced automatically
+        synced = False
         if not self._config.rsync_only and self._is_mounted_and_running(real_repo_name):
             self.logger.debug('%s is already mounted', real_repo_name)
         else:
-            self._start_sync(local_repo_name, real_repo_name)
+            synced = self._start_sync(local_repo_name, real_repo_name, force)
 
         repo_config = self._config.get_project(real_repo_name)
-        self._apply_mount(real_repo_name, repo_config)
+        fingerprint = self._packaging_fingerprint(local_repo_name)
+        mount = self._state.get_mount(self._hostname, real_repo_name)
+        develop = force or mount.get('develop_fingerprint') != fingerprint
+        if not develop:
+            self.logger.debug('%s packaging is unchanged', real_repo_name)
+
+        self._apply_mount(real_repo_name, repo_config, synced, develop)
+        if develop and repo_config and repo_config.get('python3'):
+            self._state.set_develop_fingerprint(
+                self._hostname, real_repo_name, fingerprint
+            )
 
-    def umount(self, repo_name: str) -> None:
+    def umount(self, repo_name: str, force: bool = False) -> None:
         if not self._local_dir:
             raise Exception(
                 'The local source directory is required to mount directories'
@@ -144,151 +134,135 @@ class Mounter:
         real_repo_name = self._config.get_project_name(repo_name)
 
         repo_config = self._config.get_project(real_repo_name)
-        self._unapply_mount(real_repo_name, repo_config)
+        # Without a mount there is no development install left to remove,
+        # mounts recorded before fingerprints existed are uninstalled anyway
+        mount = self._state.get_mount(self._hostname, real_repo_name)
+        uninstall = force or bool(mount)
+        self._unapply_mount(real_repo_name, repo_config, uninstall)
 
         if not self._is_mounted(real_repo_name):
             self.logger.debug('%s is not mounted', real_repo_name)
         else:
             self._stop_sync(real_repo_name)
 
-    def _apply_mount(self, repo_name: str, config: ProjectConfigData) -> None:
+    def _apply_mount(
+        self, repo_name: str, config: ProjectConfigData, synced: bool, develop: bool
+    ) -> None:
         if not config:
             return
 
-        wazo = sh.ssh.bake(self._hostname)
-        if config.get('python3'):
-            self._mount_python3(wazo, repo_name)
-        binds = config.get('bind')
-        if binds:
-            self._bind_files(wazo, repo_name, binds)
+        # Files are only waited for while the sync daemon is still copying them
+        wait_timeout = None if synced else self._config.sync_timeout
+        plan = MountPlan.for_mount(
+            self._remote_dir, repo_name, config, wait_timeout, develop
+        )
+        self._run_plan(repo_name, plan)
 
-    def _unapply_mount(self, repo_name: str, config: ProjectConfigData) -> None:
+    def _unapply_mount(
+        self, repo_name: str, config: ProjectConfigData, uninstall: bool
+    ) -> None:
         if not config:
             return
 
-        wazo = sh.ssh.bake(self._hostname)
-        if config.get('python3'):
-            self._umount_python3(wazo, repo_name)
-        binds = config.get('bind')
-        if binds:
-            self._remove_bind_files(wazo, repo_name, binds)
-        clean = config.get('clean')
-        if clean:
-            self._clean_files(wazo, clean)
-
-    def _bind_files(
-        self, ssh: sh.Command, repo_name: str, binds: dict[str, str]
-    ) -> None:
-        mount_output = ssh('mount').strip().split('\n')
-        mounted: list[str] = []
-        for line in mount_output:
-            cols = line.split(' ')
-            mounted.append(cols[2])
-
-        self.logger.debug('mounted: %s', mounted)
-
-        for source, dest in binds.items():
-            if dest in mounted:
-                self.logger.debug('%s is already mounted...', dest)
-                continue
-            src_path = os.path.join(self._remote_dir, repo_name, source)
-            self._wait_for_file(ssh, src_path)
-            self._ensure_dest_exists(ssh, src_path, dest)
-            cmd = f'mount --bind {shlex.quote(src_path)} {shlex.quote(dest)}'
-            self.logger.debug(ssh(cmd))
-
-    def _clean_files(self, ssh: sh.Command, files: list[str]) -> None:
-        ssh(f'rm -rf {" ".join(shlex.quote(f) for f in files)}')
-
-    def _remove_bind_files(
-        self, ssh: sh.Command, repo_name: str, binds: dict[str, str]
-    ) -> None:
-        mount_output = ssh('mount').strip().split('\n')
-        mounted = []
-        for line in mount_output:
-            cols = line.split(' ')
-            mounted.append(cols[2])
+        plan = MountPlan.for_umount(self._remote_dir, repo_name, config, uninstall)
+        self._run_plan(repo_name, plan)
 
-        self.logger.debug('mounted: %s', mounted)
-
-        for source, dest in binds.items():
-            if dest not in mounted:
+    def _packaging_fingerprint(self, local_repo_name: str) -> str:
+        digest = hashlib.sha256()
+        for filename in PACKAGING_FILES:
+            path = os.path.join(self._local_dir, local_repo_name, filename)
+            try:
+                with open(path, 'rb') as f:
+                    content = f.read()
+            except OSError:
                 continue
+            digest.update(f'{filename}:{len(content)}:'.encode())
+            digest.update(content)
+        return digest.hexdigest()
 
-            cmd = f'umount {shlex.quote(dest)}'
-            self.logger.debug(ssh(cmd))
-
-    def _mount_python3(self, ssh: sh.Command, repo_name: str) -> None:
-        setup_path = os.path.join(self._remote_dir, repo_name, 'setup.py')
-        self._wait_for_file(ssh, setup_path)
-
-        repo_dir = os.path.join(self._remote_dir, repo_name)
-        # -N flag ensures the dependencies are not installed/updated,
-        # in order to retain consistency of debian packaging
-        cmd = f'cd {shlex.quote(repo_dir)} && python3 setup.py develop -N'
-        self.logger.debug(ssh(cmd))
-
-    def _umount_python3(self, ssh: sh.Command, repo_name: str) -> None:
-        repo_dir = os.path.join(self._remote_dir, repo_name)
-        cmd = f'cd {shlex.quote(repo_dir)} && python3 setup.py develop --uninstall'
-        self.logger.debug(ssh(cmd))
-
-    def _ensure_dest_exists(self, ssh: sh.Command, src_path: str, dest: str) -> None:
-        q_dest = shlex.quote(dest)
-        q_src = shlex.quote(src_path)
-        ssh(
-            f'if [ ! -e {q_dest} ]; then '
-            f'if [ -d {q_src} ]; then mkdir -p {q_dest}; '
-            f'else mkdir -p "$(dirname {q_dest})" && touch {q_dest}; fi; fi'
-        )
-
-    def _wait_for_file(self, ssh: sh.Command, filename: str) -> None:
-        ssh(f'while [ ! -e {shlex.quote(filename)} ]; do sleep 0.2; done')
+    def _run_plan(self, repo_name: str, plan: MountPlan) -> None:
+        if not plan:
+            return
 
-    def _start_sync(self, local_repo_name: str, real_repo_name: str) -> None:
+        results = plan.run(self._ssh.get(self._hostname))
+        for result in results:
+            self.logger.debug(
+                '%s: %s %s %s',
+                repo_name,
+                result['name'],
+                result['target'],
+                result['status'],
+            )
+            if result['output']:
+                self.logger.debug(result['output'])
+            if result['status'] == 'failed':
+                raise Exception(
+                    f'{repo_name}: {result["name"]} {result["target"]} failed: '
+                    f'{result["output"]}'
+                )
+
+    def _start_sync(
+        self, local_repo_name: str, real_repo_name: str, force: bool = False
+    ) -> bool:
+        """Returns True when the repository is already synced on the remote host"""
         local_path = os.path.join(self._local_dir, local_repo_name)
         remote_path = os.path.join(self._remote_dir, real_repo_name)
-        config_filename: str | None = None
-        pid_filename: str | None = None
-        communicate_kwargs: dict[str, Any] = {}
 
         if self._config.rsync_only:
-            sync_command = [
-                'rsync',
-                *RSYNC_OPTIONS,
-                f'{local_path}/',
-                f'{self._hostname}:{remote_path}/',
-            ]
-        else:
-            config = LSYNC_CONFIG_TEMPLATE.render(
-                source=local_path, host=self._hostname, destination=remote_path
-            )
-
-            with tempfile.NamedTemporaryFile(
-                mode='w', dir=self._config.cache_dir, delete=False
-            ) as f:
-                config_filename = f.name
-                f.write(config)
+            # rsync is done once it exits, there is nothing left to wait for
+            if not self._rsync(local_path, remote_path, real_repo_name, force):
+                return False
+            self._state.add_mount(self._hostname, real_repo_name, None, None)
+            return True
 
-            pid_filename = f'{config_filename}.pid'
-            sync_command = ['lsyncd', config_filename, '--pidfile', pid_filename]
-            communicate_kwargs = {'timeout': 1}
+        mount = self._state.get_mount(self._hostname, real_repo_name)
+        if mount.get('lsync_pidfile'):
+            # Recorded by a version running one lsyncd per repository
+            self._stop_lsync(mount)
+
+        engine = self._config.sync_engine
+        host_sync = self._supervisor.get(self._hostname, engine)
+        host_sync.add(real_repo_name, local_path, remote_path)
+        self._supervisor.invalidate(self._hostname, engine)
+        self._state.add_mount(self._hostname, real_repo_name, None, None, engine)
+        # Files still missing afterwards are waited for on the remote host
+        return host_sync.wait_ready(real_repo_name, self._config.sync_timeout)
+
+    def _rsync(
+        self, local_path: str, remote_path: str, repo_name: str, force: bool
+    ) -> bool:
+        manifest_path = os.path.join(
+            self._config.cache_dir,
+            _MANIFEST_DIRNAME,
+            self._hostname,
+            f'{repo_name}.json',
+        )
+        manifest = Manifest.scan(local_path, remote_path)
+        previous = None if force else Manifest.load(manifest_path)
+        target = [f'{local_path}/', f'{self._hostname}:{remote_path}/']
+
+        files: str | None = None
+        if previous and previous.destination == remote_path:
+            changed, deleted = manifest.diff(previous)
+            if not changed and not deleted:
+                self.logger.debug('%s is unchanged, skipping rsync', repo_name)
+                return True
+            self.logger.debug(
+                '%s: %s changed, %s deleted', repo_name, len(changed), len(deleted)
+            )
+            sync_command = ['rsync', *RSYNC_DELTA_OPTIONS, *target]
+            files = '\0'.join(changed + deleted)
+        else:
+            sync_command = ['rsync', *RSYNC_OPTIONS, *target]
 
-        # Run sync command
         self.logger.debug('%s', ' '.join(sync_command))
-        proc = subprocess.Popen(sync_command)
-        try:
-            outs, errs = proc.communicate(**communicate_kwargs)
-            if errs:
-                self.logger.info('%s failed %s', ' '.join(sync_command), errs)
-                return
-        except subprocess.TimeoutExpired:
-            self.logger.info('%s failed %s', ' '.join(sync_command), 'timeout')
-            return
+        result = subprocess.run(sync_command, input=files, text=True)
+        if result.returncode != 0:
+            self.logger.info('%s failed %s', ' '.join(sync_command), result.returncode)
+            return False
 
-        self._state.add_mount(
-            self._hostname, real_repo_name, config_filename, pid_filename
-        )
+        manifest.save(manifest_path)
+        return True
 
     def _stop_sync(self, repo_name: str) -> None:
         mount = self._state.get_mount(self._hostname, repo_name)
@@ -301,7 +275,12 @@ class Mounter:
         if self._config.rsync_only:
             return
 
-        self._stop_lsync(mount)
+        engine = mount.get('sync_engine')
+        if engine:
+            self._supervisor.get(self._hostname, engine).remove(repo_name)
+            self._supervisor.invalidate(self._hostname, engine)
+        elif mount.get('lsync_pidfile'):
+            self._stop_lsync(mount)
 
     def _stop_lsync(self, mount: MountData) -> None:
         pid_filename: str = mount['lsync_pidfile']  # type: ignore
@@ -0,0 +1,241 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+from __future__ import annotations
+
+import os
+import shlex
+from typing import TYPE_CHECKING, Literal, TypedDict
+
+if TYPE_CHECKING:
+    from wazo_sdk.config import ProjectConfigData
+    from wazo_sdk.ssh import SSHSession
+
+StepStatus = Literal['ok', 'skipped', 'failed']
+
+_STEP_MARKER = '##wdk-step'
+# Printed by wdk_skip for a step with nothing to do, exit codes are left to the commands
+_SKIPPED_MARKER = '##wdk-skip'
+
+_PRELUDE = '''\
+wdk_is_mounted() {
+    # Mount points are octal-escaped in /proc/self/mounts, e.g. \\040 for a space.
+    # The path is given in the environment, awk -v would interpret its backslashes
+    WDK_PATH="$1" awk '{
+        p = $2
+        gsub(/\\\\040/, " ", p); gsub(/\\\\011/, "\\t", p); gsub(/\\\\012/, "\\n", p)
+        gsub(/\\\\134/, "\\\\", p)
+    } p == ENVIRON["WDK_PATH"] { found = 1 } END { exit !found }' /proc/self/mounts
+}
+wdk_skip() {
+    echo '##wdk-skip'
+}
+wdk_wait_event() {
+    if ! command -v inotifywait >/dev/null 2>&1; then
+        sleep 0.1
+        return
+    fi
+    for f in "$@"; do
+        shift
+        d=$(dirname "$f")
+        while [ ! -d "$d" ]; do d=$(dirname "$d"); done
+        set -- "$@" "$d"
+    done
+    inotifywait -qq -t 1 -e create -e moved_to -e close_write "$@" 2>/dev/null
+}
+wdk_wait_for() {
+    timeout=$1
+    shift
+    deadline=$(( $(date +%s) + timeout ))
+    while :; do
+        for f in "$@"; do
+            shift
+            [ -e "$f" ] || set -- "$@" "$f"
+        done
+        [ $# -eq 0 ] && return 0
+        if [ "$(date +%s)" -gt "$deadline" ]; then
+            echo "timed out after ${timeout}s waiting for the sync of: $*"
+            return 1
+        fi
+        wdk_wait_event "$@"
+    done
+}
+'''
+
+_STEP_TEMPLATE = '''\
+wdk_step_{index}() {{
+{body}
+}}
+out=$(wdk_step_{index} </dev/null 2>&1)
+rc=$?
+[ -n "$out" ] && printf '%s\\n' "$out"
+printf '{marker} {index} %s\\n' "$rc"
+[ "$rc" -eq 0 ] || exit 1
+'''
+
+
+class StepResult(TypedDict):
+    name: str
+    target: str
+    status: StepStatus
+    output: str
+
+
+class _Step:
+    def __init__(self, name: str, target: str, body: list[str]) -> None:
+        self.name = name
+        self.target = target
+        self.body = body
+
+
+class MountPlan:
+    """The remote side of (un)mounting a project, run as a single shell script
+
+    Each step is idempotent: steps with nothing to do report themselves as
+    skipped. The script stops at the first failing step.
+    """
+
+    def __init__(self, repo_dir: str) -> None:
+        self.repo_dir = repo_dir
+        self._steps: list[_Step] = []
+
+    def __bool__(self) -> bool:
+        return bool(self._steps)
+
+    @classmethod
+    def for_mount(
+        cls,
+        remote_dir: str,
+        repo_name: str,
+        config: ProjectConfigData,
+        wait_timeout: int | None = None,
+        develop: bool = True,
+    ) -> MountPlan:
+        """wait_timeout is None when the files are known to be synced already"""
+        plan = cls(os.path.join(remote_dir, repo_name))
+        binds = config.get('bind') or {}
+        develop = develop and bool(config.get('python3'))
+        if wait_timeout is not None:
+            required = list(binds)
+            if develop:
+                required.insert(0, 'setup.py')
+            if required:
+                plan.add_wait(required, wait_timeout)
+        if develop:
+            plan.add_develop()
+        for source, dest in binds.items():
+            plan.add_bind(source, dest)
+        return plan
+
+    @classmethod
+    def for_umount(
+        cls,
+        remote_dir: str,
+        repo_name: str,
+        config: ProjectConfigData,
+        uninstall: bool = True,
+    ) -> MountPlan:
+        plan = cls(os.path.join(remote_dir, repo_name))
+        if uninstall and config.get('python3'):
+            plan.add_uninstall()
+        for dest in (config.get('bind') or {}).values():
+            plan.add_unbind(dest)
+        clean = config.get('clean')
+        if clean:
+            plan.add_clean(clean)
+        return plan
+
+    def add_wait(self, files: list[str], timeout: int) -> None:
+        paths = [os.path.join(self.repo_dir, f) for f in files]
+        body = [f'wdk_wait_for {timeout} {" ".join(shlex.quote(p) for p in paths)}']
+        self._steps.append(_Step('wait', ' '.join(files), body))
+
+    def add_develop(self) -> None:
+        q_repo_dir = shlex.quote(self.repo_dir)
+        # -N flag ensures the dependencies are not installed/updated,
+        # in order to retain consistency of debian packaging
+        body = [f'cd {q_repo_dir} && python3 setup.py develop -N']
+        self._steps.append(_Step('develop', self.repo_dir, body))
+
+    def add_uninstall(self) -> None:
+        q_repo_dir = shlex.quote(self.repo_dir)
+        body = [f'cd {q_repo_dir} && python3 setup.py develop --uninstall']
+        self._steps.append(_Step('uninstall', self.repo_dir, body))
+
+    def add_bind(self, source: str, dest: str) -> None:
+        q_src = shlex.quote(os.path.join(self.repo_dir, source))
+        q_dest = shlex.quote(dest)
+        body = [
+            f'wdk_is_mounted {q_dest} && {{ wdk_skip; return 0; }}',
+            f'if [ ! -e {q_dest} ]; then',
+            f'    if [ -d {q_src} ]; then mkdir -p {q_dest};',
+            f'    else mkdir -p "$(dirname {q_dest})" && touch {q_dest}; fi',
+            'fi',
+            f'mount --bind {q_src} {q_dest}',
+        ]
+        self._steps.append(_Step('bind', dest, body))
+
+    def add_unbind(self, dest: str) -> None:
+        q_dest = shlex.quote(dest)
+        body = [
+            f'wdk_is_mounted {q_dest} || {{ wdk_skip; return 0; }}',
+            f'umount {q_dest}',
+        ]
+        self._steps.append(_Step('unbind', dest, body))
+
+    def add_clean(self, files: list[str]) -> None:
+        body = [f'rm -rf {" ".join(shlex.quote(f) for f in files)}']
+        self._steps.append(_Step('clean', ' '.join(files), body))
+
+    def render(self) -> str:
+        script = [_PRELUDE]
+        for index, step in enumerate(self._steps):
+            body = '\n'.join(f'    {line}' for line in step.body)
+            script.append(
+                _STEP_TEMPLATE.format(
+                    index=index,
+                    body=body,
+                    marker=_STEP_MARKER,
+                )
+            )
+        return ''.join(script)
+
+    def run(self, ssh: SSHSession) -> list[StepResult]:
+        output = ssh(
+            f'sh -c {shlex.quote(self.render())}', _ok_code=[0, 1], _return_cmd=True
+        )
+        results = self.parse(str(output))
+        # The script exits with 1 when a step failed, or when it failed before any step
+        if output.exit_code and not any(r['status'] == 'failed' for r in results):
+            remote_output = str(output) + output.stderr.decode(errors='replace')
+            raise Exception(f'Failed to run the mount script: {remote_output.strip()}')
+        return results
+
+    def parse(self, output: str) -> list[StepResult]:
+        results: list[StepResult] = []
+        lines: list[str] = []
+        skipped = False
+        for line in output.split('\n'):
+            if line == _SKIPPED_MARKER:
+                skipped = True
+                continue
+            if not line.startswith(_STEP_MARKER):
+                lines.append(line)
+                continue
+
+            index, exit_code = (int(value) for value in line.split()[1:])
+            step = self._steps[index]
+            status: StepStatus = 'failed'
+            if exit_code == 0:
+                status = 'skipped' if skipped else 'ok'
+            results.append(
+                {
+                    'name': step.name,
+                    'target': step.target,
+                    'status': status,
+                    'output': '\n'.join(lines),
+                }
+            )
+            lines = []
+            skipped = False
+        return results
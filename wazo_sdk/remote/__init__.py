@@ -0,0 +1,34 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+"""Scripts run on the Wazo with `python3 -c`
+
+Each module of this package only uses the standard library, its source is
+sent over ssh and it reads its arguments as JSON from argv. A script writes its
+result as JSON on a last stderr line starting with RESULT_MARKER, the other
+lines of stderr may come from ssh.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shlex
+from typing import Any
+
+RESULT_MARKER = '##wdk-result '
+
+
+def command(name: str, args: Any) -> str:
+    """The remote command line running the script of a module with its arguments"""
+    with open(os.path.join(os.path.dirname(__file__), f'{name}.py')) as f:
+        source = f.read()
+    return f'python3 -c {shlex.quote(source)} {shlex.quote(json.dumps(args))}'
+
+
+def result(stderr: str) -> Any:
+    """The result written by a script on stderr, None when there is none"""
+    for line in reversed(stderr.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER) :])
+    return None
@@ -0,0 +1,228 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+"""Follow several log files at once, like `tail -F`
+
+Arguments: {"files": [...], "lines": 10, "pattern": null, "level": null,
+"positions": {"<file>": {"inode": ..., "offset": ...}}}
+
+Each line is written as `<index of the file> <line>`, followed by the
+position reached in the file as `#<index> <inode> <offset>`. The starting
+position of each file is written first. The lines read in a round are
+flushed together. A file with a position resumes from it, from the rotated
+file `<file>.1` first when the file was rotated since. Other files start
+with their last lines, from their beginning with "lines": null. Lines not
+matching the pattern or
+below the level never leave the host. The script exits when its standard
+input is closed, i.e. when the ssh client is gone.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import select
+import sys
+from typing import BinaryIO
+
+POLL_INTERVAL = 0.2
+_TAIL_CHUNK = 65536
+# Only the start of a line is searched for its level, not the message
+_LEVEL_PREFIX = 120
+_LEVEL = re.compile(rb'\b(DEBUG|VERBOSE|INFO|NOTICE|WARNING|ERROR|CRITICAL)\b')
+LEVELS = {
+    'DEBUG': 10,
+    'VERBOSE': 15,
+    'INFO': 20,
+    'NOTICE': 25,
+    'WARNING': 30,
+    'ERROR': 40,
+    'CRITICAL': 50,
+}
+
+
+def line_level(line: bytes) -> str | None:
+    match = _LEVEL.search(line, 0, _LEVEL_PREFIX)
+    return match.group(1).decode() if match else None
+
+
+def highest_level(data: bytes) -> str | None:
+    """Highest level named anywhere in the lines, at least that of the lines"""
+    names = {name.decode() for name in _LEVEL.findall(data)}
+    return max(names, key=LEVELS.__getitem__, default=None)
+
+
+class LineFilter:
+    """Lines without a level, e.g. tracebacks, go with the line before them"""
+
+    def __init__(self, pattern: str | None, level: str | None) -> None:
+        self._pattern = re.compile(pattern.encode()) if pattern else None
+        self._min_level = LEVELS[level] if level else 0
+        self._keep_continuation = True
+
+    def reset(self, level: str | None) -> None:
+        """The next lines without a level continue a line of this level"""
+        self._keep_continuation = not level or LEVELS[level] >= self._min_level
+
+    def __call__(self, line: bytes) -> bool:
+        if self._min_level:
+            level = line_level(line)
+            if level:
+                self._keep_continuation = LEVELS[level] >= self._min_level
+            if not self._keep_continuation:
+                return False
+        return self._pattern is None or self._pattern.search(line) is not None
+
+
+class Follower:
+    """A log file followed across rotations and truncations"""
+
+    def __init__(self, path: str, line_filter: LineFilter) -> None:
+        self.path = path
+        self.inode: int | None = None
+        self.offset = 0
+        self._file: BinaryIO | None = None
+        self._partial = b''
+        self._filter = line_filter
+
+    @property
+    def position(self) -> tuple[int | None, int]:
+        """Inode and offset of the end of the last complete line read"""
+        return self.inode, self.offset - len(self._partial)
+
+    def resume(self, inode: int, offset: int) -> None:
+        """Starts where a previous follower stopped"""
+        for path in (self.path, f'{self.path}.1'):
+            try:
+                file = open(path, 'rb')
+            except OSError:
+                continue
+            stat = os.fstat(file.fileno())
+            if stat.st_ino == inode and stat.st_size >= offset:
+                # When rotated, the next read finishes it then opens the new file
+                self._file, self.inode, self.offset = file, inode, offset
+                file.seek(offset)
+                return
+            file.close()
+
+        # Rotated more than once or truncated: the whole current file
+        self._open()
+
+    def start(self, lines: int | None) -> None:
+        """Starts with the last lines of the file, all of them with None"""
+        if not self._open() or lines is None:
+            return
+        assert self._file
+        size = os.fstat(self._file.fileno()).st_size
+        start = max(size - _TAIL_CHUNK, 0)
+        self._file.seek(start)
+        chunk = self._file.read(size - start)
+        position = len(chunk)
+        # The last character is usually the end of the last line
+        for _ in range(lines + 1):
+            position = chunk.rfind(b'\n', 0, position)
+            if position < 0:
+                break
+        if position < 0 and start == 0:
+            self.offset = 0
+        else:
+            self.offset = start + position + 1
+        self._file.seek(self.offset)
+
+    def read_lines(self) -> list[bytes]:
+        lines: list[bytes] = []
+        if self._file is None:
+            if not self._open():
+                return lines
+        else:
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                stat = None
+            if stat is None or stat.st_ino != self.inode:
+                # Rotated: the end of the old file, then the new one
+                lines = self._read()
+                self._close()
+                if stat is None or not self._open():
+                    return lines
+            elif stat.st_size < self.offset:
+                # Truncated, e.g. by logrotate copytruncate
+                self._file.seek(0)
+                self.offset = 0
+                self._partial = b''
+        return lines + self._read()
+
+    def _open(self) -> bool:
+        try:
+            self._file = open(self.path, 'rb')
+        except OSError:
+            return False
+        self.inode = os.fstat(self._file.fileno()).st_ino
+        self.offset = 0
+        return True
+
+    def _close(self) -> None:
+        if self._file:
+            self._file.close()
+        self._file = None
+        self._partial = b''
+
+    def _read(self) -> list[bytes]:
+        data = self._file.read() if self._file else b''
+        if not data:
+            return []
+        self.offset += len(data)
+        data = self._partial + data
+        *lines, self._partial = data.split(b'\n')
+        return [line + b'\n' for line in lines if self._filter(line)]
+
+
+def main() -> None:
+    args = json.loads(sys.argv[1])
+    followers = [
+        Follower(path, LineFilter(args.get('pattern'), args.get('level')))
+        for path in args['files']
+    ]
+    positions = args.get('positions') or {}
+    for follower in followers:
+        if follower.path in positions:
+            position = positions[follower.path]
+            follower.resume(position['inode'], position['offset'])
+        else:
+            follower.start(args.get('lines', 10))
+
+    out = sys.stdout.buffer
+    stdin = sys.stdin.fileno()
+    reported: list[tuple[int, int] | None] = [None] * len(followers)
+    # A connection dropping before the first lines resumes from here
+    for index, follower in enumerate(followers):
+        inode, offset = follower.position
+        if inode is not None:
+            out.write(b'#%d %d %d\n' % (index, inode, offset))
+            reported[index] = (inode, offset)
+    out.flush()
+    while True:
+        written = False
+        for index, follower in enumerate(followers):
+            for line in follower.read_lines():
+                out.write(b'%d %s' % (index, line))
+            inode, offset = follower.position
+            if inode is not None and (inode, offset) != reported[index]:
+                out.write(b'#%d %d %d\n' % (index, inode, offset))
+                reported[index] = (inode, offset)
+                written = True
+        if written:
+            out.flush()
+            continue
+
+        readable, _, _ = select.select([stdin], [], [], POLL_INTERVAL)
+        if readable and not os.read(stdin, 4096):
+            return
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
@@ -0,0 +1,83 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+"""Write the bytes of a log file added since a position, gzipped
+
+Arguments: {"file": "...", "inode": null, "offset": 0, "max_bytes": ...}
+
+When the file has another inode than the position, it was rotated: the end
+of the rotated file `<file>.1` is written instead, and the next read starts
+at the beginning of the new file. At most max_bytes are written. What was
+read is written as JSON on a last stderr line starting with ##wdk-result:
+{"inode", "start", "end", "size", "mtime", "rotated", "missed"}, where
+mtime is the last change of the file read, "YYYY-MM-DD HH:MM:SS" in the time
+of the host, and missed means the position was lost, e.g. rotated more than
+once, and the new file is read from its beginning.
+"""
+
+from __future__ import annotations
+
+import datetime
+import gzip
+import json
+import os
+import sys
+from typing import Any, BinaryIO
+
+_COPY_SIZE = 1048576
+# RESULT_MARKER of the package, not importable from a script
+_RESULT_MARKER = '##wdk-result '
+
+
+def copy(file: BinaryIO, start: int, end: int, out: gzip.GzipFile) -> None:
+    file.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        data = file.read(min(_COPY_SIZE, remaining))
+        if not data:
+            break
+        out.write(data)
+        remaining -= len(data)
+
+
+def main() -> None:
+    args = json.loads(sys.argv[1])
+    path, inode, offset = args['file'], args.get('inode'), args.get('offset', 0)
+    max_bytes = args['max_bytes']
+
+    file = open(path, 'rb')
+    current_inode = os.fstat(file.fileno()).st_ino
+    result: dict[str, Any] = {'inode': current_inode, 'rotated': False, 'missed': False}
+    if inode is not None and inode != current_inode:
+        try:
+            rotated = open(f'{path}.1', 'rb')
+        except OSError:
+            rotated = None
+        if rotated and os.fstat(rotated.fileno()).st_ino == inode:
+            file.close()
+            file = rotated
+            result['rotated'] = True
+        else:
+            result['missed'] = True
+            offset = 0
+
+    stat = os.fstat(file.fileno())
+    size = stat.st_size
+    mtime = datetime.datetime.fromtimestamp(stat.st_mtime)
+    if offset > size:
+        # Truncated
+        result['missed'] = True
+        offset = 0
+    end = min(size, offset + max_bytes)
+    with gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb', compresslevel=6) as out:
+        copy(file, offset, end, out)
+    file.close()
+
+    result.update(
+        start=offset, end=end, size=size, mtime=mtime.isoformat(' ', timespec='seconds')
+    )
+    sys.stderr.write(f'{_RESULT_MARKER}{json.dumps(result)}\n')
+
+
+if __name__ == '__main__':
+    main()
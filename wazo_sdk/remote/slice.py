@@ -0,0 +1,157 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+"""Write the lines of a log file within a time range
+
+Arguments: {"file": "...", "since": ..., "until": ..., "compress": false}
+
+since and until are "YYYY-MM-DD HH:MM:SS" in the time of the host, a number
+of seconds before now, or null for the start and end of the file. The byte
+offsets of the range are found by binary search on the timestamps of the
+lines, so only the lines of the range are read. Timestamps are read from
+lines starting with an ISO date, as written by the wazo services, or with a
+syslog date, as written by asterisk. The offsets are written as JSON on a
+last stderr line starting with ##wdk-result once the slice is written.
+"""
+
+from __future__ import annotations
+
+import datetime
+import gzip
+import json
+import os
+import re
+import sys
+from typing import BinaryIO
+
+_ISO_TIME = re.compile(rb'\[?(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})')
+_SYSLOG_TIME = re.compile(rb'\[?([A-Z][a-z]{2}) +(\d{1,2}) (\d{2}:\d{2}:\d{2})')
+# The binary search stops when the range is this small, then lines are read
+_SCAN_SIZE = 65536
+# Lines without a timestamp, e.g. tracebacks, are skipped up to this length
+_MAX_SKIP = 1048576
+_COPY_SIZE = 1048576
+# RESULT_MARKER of the package, not importable from a script
+_RESULT_MARKER = '##wdk-result '
+
+
+def line_time(line: bytes, year: int) -> datetime.datetime | None:
+    """Timestamp a line starts with, syslog dates have no year so it is given"""
+    match = _ISO_TIME.match(line)
+    if match:
+        return datetime.datetime.fromisoformat(
+            f'{match.group(1).decode()} {match.group(2).decode()}'
+        )
+    match = _SYSLOG_TIME.match(line)
+    if match:
+        month, day, time = (group.decode() for group in match.groups())
+        try:
+            return datetime.datetime.strptime(
+                f'{year} {month} {day} {time}', '%Y %b %d %H:%M:%S'
+            )
+        except ValueError:
+            return None
+    return None
+
+
+def parse_time(value: str | float | int | None) -> datetime.datetime | None:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.datetime.now() - datetime.timedelta(seconds=value)
+    return datetime.datetime.fromisoformat(value)
+
+
+class TimedLog:
+    """Timestamps of the lines of a log file, read at any offset"""
+
+    def __init__(self, file: BinaryIO, year: int) -> None:
+        self._file = file
+        # syslog dates have no year, the year of the last change of the file
+        self._year = year
+        self.size = os.fstat(file.fileno()).st_size
+
+    def next_timed_line(self, offset: int) -> tuple[int, datetime.datetime] | None:
+        """The first line with a timestamp starting at or after an offset"""
+        self._file.seek(offset)
+        if offset:
+            # Skips the end of the line the offset falls in
+            skipped = self._file.readline()
+            offset += len(skipped)
+            if not skipped.endswith(b'\n'):
+                return None
+        start = offset
+        while offset - start < _MAX_SKIP:
+            line = self._file.readline()
+            if not line:
+                return None
+            time = line_time(line, self._year)
+            if time is not None:
+                return offset, time
+            offset += len(line)
+        return None
+
+    def find(self, target: datetime.datetime | None, after: bool = False) -> int:
+        """Offset of the first line at the target, or after it with after=True"""
+        if target is None:
+            return self.size if after else 0
+
+        def is_before(time: datetime.datetime) -> bool:
+            return time <= target if after else time < target
+
+        low, high = 0, self.size
+        while high - low > _SCAN_SIZE:
+            middle = (low + high) // 2
+            found = self.next_timed_line(middle)
+            if found is None or not is_before(found[1]):
+                high = middle
+            else:
+                low = found[0]
+
+        offset = low
+        while True:
+            found = self.next_timed_line(offset)
+            if found is None:
+                return self.size
+            line_offset, time = found
+            if not is_before(time):
+                return line_offset
+            # Continues with the line after this one
+            offset = line_offset + 1
+
+
+def copy(file: BinaryIO, start: int, end: int, out: BinaryIO) -> None:
+    file.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        data = file.read(min(_COPY_SIZE, remaining))
+        if not data:
+            break
+        out.write(data)
+        remaining -= len(data)
+
+
+def main() -> None:
+    args = json.loads(sys.argv[1])
+    with open(args['file'], 'rb') as file:
+        year = datetime.datetime.fromtimestamp(os.fstat(file.fileno()).st_mtime).year
+        log = TimedLog(file, year)
+        start = log.find(parse_time(args.get('since')))
+        end = max(log.find(parse_time(args.get('until')), after=True), start)
+
+        out: BinaryIO = sys.stdout.buffer
+        if args.get('compress'):
+            with gzip.GzipFile(fileobj=out, mode='wb', compresslevel=6) as compressed:
+                copy(file, start, end, compressed)  # type: ignore[arg-type]
+        else:
+            copy(file, start, end, out)
+        out.flush()
+    offsets = {'start': start, 'end': end, 'size': log.size}
+    sys.stderr.write(f'{_RESULT_MARKER}{json.dumps(offsets)}\n')
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except BrokenPipeError:
+        pass
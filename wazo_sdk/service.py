@@ -1,31 +1,306 @@
-# Copyright 2018-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2018-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0+
 
-from logging import Logger
+from __future__ import annotations
 
-import sh
+import os
+import shlex
+import subprocess
+import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+from typing import TYPE_CHECKING, BinaryIO, TypedDict
 
+from wazo_sdk import remote
 from wazo_sdk.config import Config
+from wazo_sdk.ssh import SSHSessionManager
+
+if TYPE_CHECKING:
+    from wazo_sdk.log_archive import LogArchive
+    from wazo_sdk.ssh import SSHSession
+
+_RESTART_MARKER = '##wdk-restart'
+
+# systemd timestamps are taken on the monotonic clock, so is the start time
+_RESTART_SCRIPT = '''\
+start=$(python3 -c 'import time; print(int(time.monotonic() * 1000000))')
+systemctl restart {units}
+rc=$?
+systemctl show --property=Id,ActiveState,ActiveEnterTimestampMonotonic {units}
+printf '{marker} %s %s\\n' "$start" "$rc"
+'''
+
+_READ_SIZE = 65536
+_FOLLOW_DIRNAME = 'follow'
+_ARCHIVE_DIRNAME = 'logs'
+# Bytes of a log file sent by a single remote command, the rest is read again
+_FETCH_SIZE = 67108864
+_FETCH_JOBS = 4
+
+
+class RestartResult(TypedDict):
+    host: str
+    service: str
+    success: bool
+    duration: float | None
 
 
 class ServiceManager:
-    def __init__(self, logger: Logger, config: Config) -> None:
+    def __init__(self, logger: Logger, config: Config, ssh: SSHSessionManager) -> None:
         self.logger = logger
         self._config = config
+        self._ssh = ssh
 
-    def restart(self, service: str) -> None:
-        project = self._config.get_project(service)
-        service_name = project.get('service', self._config.get_project_name(service))
-        ssh = sh.ssh.bake(self._config.hostname)
-        ssh(f'systemctl restart {service_name}')
+    def restart(self, services: list[str]) -> list[RestartResult]:
+        """Restarts all the services with a single remote script"""
+        host: str = self._config.hostname  # type: ignore
+        service_names = list(dict.fromkeys(self._service_name(s) for s in services))
+        if not service_names:
+            return []
+        return self._restart_on_host(host, service_names)
 
-    def tailf(self, service: str) -> None:
+    def log_filename(self, service: str) -> str:
         project = self._config.get_project(service)
         log_filename = project.get('log_filename')
         if not log_filename:
             project_name = self._config.get_project_name(service)
             log_filename = f'/var/log/{project_name}.log'
+        return log_filename
+
+    def tailf(
+        self,
+        services: list[str],
+        lines: int = 10,
+        pattern: str | None = None,
+        level: str | None = None,
+        color: bool | None = None,
+        resume: bool = False,
+    ) -> None:
+        """Follows the logs of all the services over a single remote command
+
+        Lines are prefixed with their service when there are several, and
+        filtered on the host by pattern and level. The connection is reopened
+        when it drops, without losing or repeating lines. With resume, the
+        lines written since the last tailf of these logs are printed first.
+        """
+        # Imported here to keep the startup of other commands fast
+        from wazo_sdk.log_follower import LogFollower, prefixes
+
+        hostname: str = self._config.hostname  # type: ignore
+        names = list(dict.fromkeys(self._config.get_project_name(s) for s in services))
+        files = [self.log_filename(name) for name in names]
+        if color is None:
+            color = sys.stdout.isatty()
+
+        follower = LogFollower(
+            self.logger,
+            self._ssh.get(hostname),
+            files,
+            prefixes(names, color),
+            os.path.join(self._config.cache_dir, _FOLLOW_DIRNAME, f'{hostname}.json'),
+        )
+        args = {'files': files, 'lines': lines, 'pattern': pattern, 'level': level}
+        follower.run(args, resume=resume)
+
+    def logs(
+        self,
+        service: str,
+        out: BinaryIO,
+        since: str | float | None = None,
+        until: str | float | None = None,
+        compress: bool = False,
+        decompress: bool = True,
+    ) -> None:
+        """Writes the lines of a log file within a time range
+
+        since and until are "YYYY-MM-DD HH:MM:SS" in the time of the host or
+        seconds before now. The range is found on the host, only its lines are
+        sent, gzipped when compress is set. decompress=False keeps them gzipped.
+        """
+        args = {
+            'file': self.log_filename(service),
+            'since': since,
+            'until': until,
+            'compress': compress,
+        }
+        ssh = self._ssh.get(self._config.hostname)  # type: ignore
+        process = ssh.popen(
+            remote.command('slice', args),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        # gzip header included
+        decompressor = zlib.decompressobj(wbits=31) if compress and decompress else None
+        received = 0
+        while chunk := os.read(process.stdout.fileno(), _READ_SIZE):  # type: ignore
+            received += len(chunk)
+            out.write(decompressor.decompress(chunk) if decompressor else chunk)
+        if decompressor:
+            out.write(decompressor.flush())
+        out.flush()
+
+        stderr = process.stderr.read().decode(errors='replace')  # type: ignore
+        if process.wait() != 0:
+            raise Exception(f'Failed to read {args["file"]}: {stderr.strip()}')
+        offsets = remote.result(stderr)
+        if not offsets:
+            # Only reported, the lines are already written
+            self.logger.debug('%s: no offsets in %s', args['file'], stderr.strip())
+            return
+        self.logger.debug(
+            '%s: bytes %s to %s of %s, %s bytes received',
+            args['file'],
+            offsets['start'],
+            offsets['end'],
+            offsets['size'],
+            received,
+        )
+
+    def fetch_logs(self, services: list[str] | None = None) -> dict[str, int | None]:
+        """Appends the lines written since the last fetch to the local archives
+
+        Defaults to the projects with a log_filename. Only the new bytes of
+        each log file are sent, the end of the rotated file first when it was
+        rotated since. Returns the number of bytes fetched by project, None
+        for the projects that failed, the others are fetched anyway.
+        """
+        # Imported here to keep the startup of other commands fast
+        from wazo_sdk.log_archive import LogArchive
+
+        hostname: str = self._config.hostname  # type: ignore
+        ssh = self._ssh.get(hostname)
+        names = list(
+            dict.fromkeys(
+                self._config.get_project_name(s)
+                for s in services or self._config.log_projects()
+            )
+        )
+        directory = self._archive_dir(hostname)
+        with ThreadPoolExecutor(max_workers=_FETCH_JOBS) as executor:
+            futures = {
+                name: executor.submit(
+                    self._fetch_log,
+                    ssh,
+                    self.log_filename(name),
+                    LogArchive(directory, name),
+                )
+                for name in names
+            }
+            fetched: dict[str, int | None] = {}
+            for name, future in futures.items():
+                try:
+                    fetched[name] = future.result()
+                except Exception as e:
+                    self.logger.error('Failed to fetch the logs of %s: %s', name, e)
+                    fetched[name] = None
+            return fetched
+
+    def search_logs(
+        self,
+        service: str,
+        out: BinaryIO,
+        since: str | None = None,
+        until: str | None = None,
+        level: str | None = None,
+        pattern: str | None = None,
+    ) -> None:
+        """Writes the lines of the local archive of a log file matching a search"""
+        # Imported here to keep the startup of other commands fast
+        from wazo_sdk.log_archive import LogArchive
+
+        name = self._config.get_project_name(service)
+        archive = LogArchive(self._archive_dir(self._config.hostname), name)  # type: ignore
+        if not os.path.exists(archive.path):
+            raise Exception(f'No archive of the logs of {name}, run `wdk logs fetch`')
+        for line in archive.search(since, until, level, pattern):
+            out.write(line)
+        out.flush()
+
+    def _archive_dir(self, hostname: str) -> str:
+        return os.path.join(self._config.cache_dir, _ARCHIVE_DIRNAME, hostname)
+
+    def _fetch_log(self, ssh: SSHSession, path: str, archive: LogArchive) -> int:
+        fetched = 0
+        while True:
+            args = {
+                'file': path,
+                'inode': archive.index['inode'],
+                'offset': archive.index['offset'],
+                'max_bytes': _FETCH_SIZE,
+            }
+            process = ssh.popen(
+                remote.command('read', args),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+            data, stderr = process.communicate()
+            errors = stderr.decode(errors='replace')
+            result = remote.result(errors)
+            if process.returncode != 0 or not result:
+                raise Exception(f'Failed to read {path}: {errors.strip()}')
+            # gzip header included
+            data = zlib.decompress(data, wbits=31)
+            if result['missed']:
+                self.logger.warning(
+                    '%s was rotated or truncated since the last fetch, lines are missing',
+                    path,
+                )
+
+            if result['rotated'] and result['end'] == result['size']:
+                # The rotated file is complete, its last line too
+                if data and not data.endswith(b'\n'):
+                    data += b'\n'
+                archive.append(data, result['inode'], 0, result['mtime'])
+                fetched += len(data)
+                continue
+
+            # The last line may still be written, it is read again next time
+            cut = data.rfind(b'\n') + 1
+            if not cut and result['end'] < result['size']:
+                # A line longer than what is sent at once
+                cut = len(data)
+            inode = archive.index['inode'] if result['rotated'] else result['inode']
+            archive.append(data[:cut], inode, result['start'] + cut, result['mtime'])
+            fetched += cut
+            if result['end'] == result['size']:
+                return fetched
+
+    def _service_name(self, service: str) -> str:
+        project = self._config.get_project(service)
+        return project.get('service') or self._config.get_project_name(service)
+
+    def _restart_on_host(
+        self, host: str, service_names: list[str]
+    ) -> list[RestartResult]:
+        units = ' '.join(shlex.quote(name) for name in service_names)
+        script = _RESTART_SCRIPT.format(units=units, marker=_RESTART_MARKER)
+        ssh = self._ssh.get(host)
+        output = str(ssh(f'sh -c {shlex.quote(script)}'))
+        self.logger.debug(output)
+
+        properties: list[dict[str, str]] = [{}]
+        start = 0
+        for line in output.split('\n'):
+            if line.startswith(_RESTART_MARKER):
+                start = int(line.split()[1])
+            elif not line:
+                properties.append({})
+            elif '=' in line:
+                key, value = line.split('=', 1)
+                properties[-1][key] = value
+        properties = [unit for unit in properties if unit]
 
-        ssh = sh.ssh.bake(self._config.hostname)
-        for line in ssh.tail('-f', log_filename, _iter=True):
-            print(line, end='')
+        results: list[RestartResult] = []
+        for service_name, unit in zip(service_names, properties):
+            active_since = int(unit.get('ActiveEnterTimestampMonotonic') or 0)
+            success = unit.get('ActiveState') == 'active' and active_since >= start
+            results.append(
+                {
+                    'host': host,
+                    'service': service_name,
+                    'success': success,
+                    'duration': (active_since - start) / 1e6 if success else None,
+                }
+            )
+        return results
@@ -0,0 +1,153 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+from __future__ import annotations
+
+import logging
+import os
+import subprocess
+import threading
+from logging import Logger
+from typing import Any
+
+from wazo_sdk.config import Config
+
+_CONTROL_DIRNAME = 'ssh'
+
+
+class SSHSession:
+    """Run remote commands on a host over a single multiplexed ssh connection"""
+
+    def __init__(
+        self, logger: Logger, hostname: str, control_path: str, control_persist: int
+    ) -> None:
+        self.logger = logger
+        self.hostname = hostname
+        self.commands_run = 0
+        self.handshakes = 0
+        self._options = [
+            '-o',
+            f'ControlPath={control_path}',
+            '-o',
+            f'ControlPersist={control_persist}',
+        ]
+        self._ssh: Any = None
+        self._lock = threading.Lock()
+        self._multiplexed: bool | None = None
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        self.connect()
+        with self._lock:
+            self.commands_run += 1
+            if not self._multiplexed:
+                self.handshakes += 1
+        return self._ssh(*args, **kwargs)
+
+    @property
+    def handshakes_avoided(self) -> int:
+        return self.commands_run - self.handshakes
+
+    def popen(self, command: str, **kwargs: Any) -> subprocess.Popen[bytes]:
+        """Starts a remote command whose output is read as it comes"""
+        self.connect()
+        with self._lock:
+            self.commands_run += 1
+            if not self._multiplexed:
+                self.handshakes += 1
+        ssh = [*self.command_line(), self.hostname, command]
+        return subprocess.Popen(ssh, **kwargs)
+
+    def command_line(self) -> list[str]:
+        """The ssh command, without the hostname, for tools such as rsync"""
+        return ['ssh', *self._options, '-o', 'ControlMaster=auto']
+
+    def connect(self) -> None:
+        with self._lock:
+            if self._multiplexed is not None:
+                return
+
+            # Imported here to keep the startup of commands without ssh fast
+            import sh
+
+            self._ssh = sh.ssh.bake(
+                *self._options, '-o', 'ControlMaster=auto', self.hostname
+            )
+
+            if self._control('check'):
+                self.logger.debug('reusing ssh master connection to %s', self.hostname)
+                self._multiplexed = True
+                return
+
+            self.logger.debug('opening ssh master connection to %s', self.hostname)
+            self._multiplexed = self._start_master()
+            if self._multiplexed:
+                self.handshakes += 1
+            else:
+                self.logger.debug('ssh multiplexing unavailable for %s', self.hostname)
+
+    def _control(self, command: str) -> bool:
+        cmd = ['ssh', *self._options, '-O', command, self.hostname]
+        return self._run_quiet(cmd)
+
+    def _start_master(self) -> bool:
+        cmd = [
+            'ssh',
+            *self._options,
+            '-o',
+            'ControlMaster=yes',
+            '-f',
+            '-N',
+            self.hostname,
+        ]
+        return self._run_quiet(cmd)
+
+    def _run_quiet(self, cmd: list[str]) -> bool:
+        # The master keeps running in the background once authenticated, its
+        # standard streams must not be pipes or we would wait for it to exit
+        result = subprocess.run(
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return result.returncode == 0
+
+
+class SSHSessionManager:
+    def __init__(self, logger: Logger, config: Config) -> None:
+        self.logger = logger
+        self._config = config
+        self._sessions: dict[str, SSHSession] = {}
+        self._lock = threading.Lock()
+        # sh logs every command line, remote scripts included, at info level
+        logging.getLogger('sh').setLevel(logging.WARNING)
+
+    def get(self, hostname: str) -> SSHSession:
+        with self._lock:
+            if hostname not in self._sessions:
+                self._sessions[hostname] = SSHSession(
+                    self.logger,
+                    hostname,
+                    self._control_path(),
+                    self._config.ssh_control_persist,
+                )
+            return self._sessions[hostname]
+
+    @property
+    def handshakes_avoided(self) -> int:
+        return sum(session.handshakes_avoided for session in self._sessions.values())
+
+    def report(self) -> None:
+        for hostname, session in self._sessions.items():
+            self.logger.debug(
+                'ssh %s: %s commands, %s handshakes avoided',
+                hostname,
+                session.commands_run,
+                session.handshakes_avoided,
+            )
+
+    def _control_path(self) -> str:
+        control_dir = os.path.join(self._config.cache_dir, _CONTROL_DIRNAME)
+        os.makedirs(control_dir, mode=0o700, exist_ok=True)
+        # %C is a hash of the connection parameters, short enough for a unix socket
+        return os.path.join(control_dir, '%C')
@@ -1,70 +1,176 @@
-# Copyright 2018-2024 The Wazo Authors  (see the AUTHORS file)
+# Copyright 2018-2026 The Wazo Authors  (see the AUTHORS file)
 # SPDX-License-Identifier: GPL-3.0+
 
 from __future__ import annotations
 
 import json
-from typing import TYPE_CHECKING, Any, TextIO
+import os
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any
 
 if TYPE_CHECKING:
-    from typing import TypedDict
+    from typing import NotRequired, TypedDict
 
     class MountData(TypedDict):
         project: str
         lsync_config: str | None
         lsync_pidfile: str | None
+        develop_fingerprint: NotRequired[str]
+        sync_engine: NotRequired[str]
+
+
+_SCHEMA = '''\
+CREATE TABLE IF NOT EXISTS mounts (
+    host TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    lsync_config TEXT,
+    lsync_pidfile TEXT,
+    sync_engine TEXT,
+    develop_fingerprint TEXT,
+    PRIMARY KEY (host, repo)
+)
+'''
+_MOUNT_COLUMNS = 'repo, lsync_config, lsync_pidfile, sync_engine, develop_fingerprint'
+# Waiting for another wdk process to commit
+_BUSY_TIMEOUT = 30
 
 
 class State:
-    def __init__(self, data: dict[str, Any] | None = None) -> None:
-        self._data = data or {'hosts': {}}
+    """Mounts of every host, stored in SQLite
+
+    Each change is committed right away, so concurrent wdk processes only
+    overwrite the rows they change.
+    """
+
+    def __init__(self, filename: str = ':memory:') -> None:
+        # Mounts are done from several threads at once
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(
+            filename,
+            timeout=_BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        if filename != ':memory:':
+            self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(_SCHEMA)
+
+    @classmethod
+    def open(cls, filename: str, legacy_filename: str | None = None) -> State:
+        """Opens the database, importing the JSON state file of older versions"""
+        state = cls(filename)
+        if legacy_filename:
+            try:
+                with open(legacy_filename) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return state
+            state.import_json(data)
+            os.unlink(legacy_filename)
+        return state
+
+    def import_json(self, data: dict[str, Any]) -> None:
+        rows = [
+            (
+                host,
+                repo,
+                mount.get('lsync_config'),
+                mount.get('lsync_pidfile'),
+                mount.get('sync_engine'),
+                mount.get('develop_fingerprint'),
+            )
+            for host, host_data in data.get('hosts', {}).items()
+            for repo, mount in host_data.get('mounts', {}).items()
+            if mount
+        ]
+        with self._transaction():
+            self._db.executemany(
+                f'INSERT OR IGNORE INTO mounts (host, {_MOUNT_COLUMNS}) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                rows,
+            )
 
     def add_mount(
-        self, host: str, repo: str, config: str | None, pid: str | None
+        self,
+        host: str,
+        repo: str,
+        config: str | None,
+        pid: str | None,
+        sync_engine: str | None = None,
     ) -> None:
-        mount: MountData = {
-            'project': repo,
-            'lsync_config': config,
-            'lsync_pidfile': pid,
-        }
-        self.get_mounts(host)[repo] = mount
+        # Restarting the sync does not undo the development install
+        with self._transaction():
+            self._db.execute(
+                'INSERT INTO mounts (host, repo, lsync_config, lsync_pidfile, sync_engine) '
+                'VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (host, repo) DO UPDATE SET '
+                'lsync_config = excluded.lsync_config, '
+                'lsync_pidfile = excluded.lsync_pidfile, '
+                'sync_engine = excluded.sync_engine',
+                (host, repo, config, pid, sync_engine),
+            )
+
+    def set_develop_fingerprint(self, host: str, repo: str, fingerprint: str) -> None:
+        with self._transaction():
+            self._db.execute(
+                'UPDATE mounts SET develop_fingerprint = ? WHERE host = ? AND repo = ?',
+                (fingerprint, host, repo),
+            )
 
     def get_mount(self, host: str, repo: str) -> MountData:
-        return self._nested_get('hosts', host, 'mounts', repo)  # type: ignore
+        with self._lock:
+            row = self._db.execute(
+                f'SELECT {_MOUNT_COLUMNS} FROM mounts WHERE host = ? AND repo = ?',
+                (host, repo),
+            ).fetchone()
+        return self._to_mount(row) if row else {}  # type: ignore
 
     def get_mounts(self, host: str) -> dict[str, MountData]:
-        mounts: dict[str, MountData] = self._nested_get('hosts', host, 'mounts')
-        return mounts
+        with self._lock:
+            rows = self._db.execute(
+                f'SELECT {_MOUNT_COLUMNS} FROM mounts WHERE host = ? ORDER BY repo',
+                (host,),
+            ).fetchall()
+        return {row[0]: self._to_mount(row) for row in rows}
 
     def is_mounted(self, host: str, repo: str) -> bool:
         mount = self.get_mount(host, repo)
         return bool(mount)
 
     def remove_mount(self, host: str, repo: str) -> None:
-        mounts = self._data['hosts'][host]['mounts']
-        if not mounts:
-            return
-
-        if repo not in mounts:
-            return
-
-        del mounts[repo]
-
-    def to_file(self, f: TextIO) -> None:
-        return json.dump(self._data, f)
-
-    @classmethod
-    def from_json(cls, json: dict[str, Any]) -> State:
-        return cls(json)
-
-    @classmethod
-    def from_file(cls, f: TextIO) -> State:
-        return cls.from_json(json.load(f))
-
-    def _nested_get(self, *keys: str) -> dict[str, Any]:
-        data = self._data
-        for key in keys:
-            if key not in data:
-                data[key] = {}
-            data = data[key]
-        return data
+        with self._transaction():
+            self._db.execute(
+                'DELETE FROM mounts WHERE host = ? AND repo = ?', (host, repo)
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        with self._lock:
+            # Takes the write lock now, instead of failing on the first write
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                yield
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+
+    def _to_mount(self, row: tuple[Any, ...]) -> MountData:
+        repo, lsync_config, lsync_pidfile, sync_engine, develop_fingerprint = row
+        mount: MountData = {
+            'project': repo,
+            'lsync_config': lsync_config,
+            'lsync_pidfile': lsync_pidfile,
+        }
+        if sync_engine:
+            mount['sync_engine'] = sync_engine
+        if develop_fingerprint:
+            mount['develop_fingerprint'] = develop_fingerprint
+        return mount
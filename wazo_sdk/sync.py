@@ -0,0 +1,406 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+from __future__ import annotations
+
+import abc
+import fcntl
+import functools
+import json
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from logging import Logger
+from typing import TYPE_CHECKING, Any, TypedDict
+
+from wazo_sdk.config import SYNC_ENGINE_LSYNCD, SYNC_ENGINE_WDK, Config
+
+if TYPE_CHECKING:
+    from jinja2 import Template
+
+    from wazo_sdk.ssh import SSHSession, SSHSessionManager
+    from wazo_sdk.sync_engine import EngineConfig, RepoConfig
+
+SYNC_DIRNAME = 'sync'
+_START_TIMEOUT = 5
+_POLL_INTERVAL = 0.05
+_CONFIG_SUFFIX = '.json'
+_STATUS_SUFFIX = '.status.json'
+
+LSYNC_CONFIG_TEMPLATE = '''\
+settings {
+    logfile = "{{ log }}",
+}
+{% for repo in repos %}
+sync {
+    default.rsync,
+    delay = 1,
+    source = "{{ repo.source }}",
+    target = "{{ host }}:{{ repo.destination }}",
+    exclude = {'.git', '.tox', 'node_modules'},
+    rsync = {
+        xattrs = true,
+        archive = true,
+        perms = true,
+        rsh = "{{ rsh }}"
+    }
+}
+{% endfor %}'''
+
+
+class SyncStatus(TypedDict):
+    host: str
+    engine: str
+    repos: list[str]
+    running: bool
+    restarted: bool
+
+
+class HostSync(abc.ABC):
+    """One sync process per host, shared by all the repositories mounted on it
+
+    The list of repositories is kept in a JSON file next to the pidfile and the
+    process is told to reload it when a repository is added or removed.
+    """
+
+    name: str
+
+    def __init__(
+        self, logger: Logger, config: Config, hostname: str, ssh: SSHSession
+    ) -> None:
+        self.logger = logger
+        self._hostname = hostname
+        self._ssh = ssh
+        self._dir = os.path.join(config.cache_dir, SYNC_DIRNAME)
+        prefix = os.path.join(self._dir, f'{hostname}.{self.name}')
+        self.config_path = f'{prefix}{_CONFIG_SUFFIX}'
+        self.pid_path = f'{prefix}.pid'
+        self.status_path = f'{prefix}{_STATUS_SUFFIX}'
+        self.log_path = f'{prefix}.log'
+        self._lock = threading.Lock()
+
+    def add(self, repo: str, source: str, destination: str) -> None:
+        with self._locked():
+            repos = self._read_repos()
+            repos[repo] = {'source': source, 'destination': destination}
+            self._write_config(repos)
+            if self.is_running():
+                self._reload()
+            else:
+                self._start()
+
+    def remove(self, repo: str) -> None:
+        with self._locked():
+            repos = self._read_repos()
+            repos.pop(repo, None)
+            self._write_config(repos)
+            if not repos:
+                self._stop()
+            elif self.is_running():
+                self._reload()
+
+    def ensure_running(self) -> bool:
+        """Restarts the process if it died, returns True when it was restarted"""
+        with self._locked():
+            if not self._read_repos() or self.is_running():
+                return False
+            self._start()
+            return True
+
+    def repos(self) -> list[str]:
+        return sorted(self._read_repos())
+
+    def is_running(self) -> bool:
+        # Imported here since the supervisor runs with every command
+        import psutil
+
+        pid = self._read_pid()
+        if not pid or not psutil.pid_exists(pid):
+            return False
+        try:
+            return self._is_sync_process(psutil.Process(pid).cmdline())
+        except psutil.Error:
+            return False
+
+    def wait_ready(self, repo: str, timeout: int) -> bool:
+        """Returns True once the initial sync of the repository is done
+
+        False means the readiness is unknown, for the processes that cannot
+        report it, and the files are then waited for on the remote host.
+        """
+        return False
+
+    @abc.abstractmethod
+    def _is_sync_process(self, cmdline: list[str]) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def _start(self) -> None:
+        ...
+
+    def _reload(self) -> None:
+        self._signal(signal.SIGHUP)
+
+    def _stop(self) -> None:
+        if self.is_running():
+            self._signal(signal.SIGTERM)
+        for path in (self.pid_path, self.status_path):
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def _signal(self, signum: int) -> None:
+        pid = self._read_pid()
+        if not pid:
+            return
+        try:
+            os.kill(pid, signum)
+        except OSError:
+            self.logger.error('failed to signal %s', pid)
+
+    def _read_pid(self) -> int | None:
+        try:
+            with open(self.pid_path) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _read_repos(self) -> dict[str, RepoConfig]:
+        try:
+            with open(self.config_path) as f:
+                config: EngineConfig = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return config['repos']
+
+    def _write_config(self, repos: dict[str, RepoConfig]) -> None:
+        config: EngineConfig = {
+            'hostname': self._hostname,
+            'rsh': shlex.join(self._ssh.command_line()),
+            'status_file': self.status_path,
+            'repos': repos,
+        }
+        self._write_file(self.config_path, json.dumps(config))
+
+    def _write_file(self, path: str, content: str) -> None:
+        with tempfile.NamedTemporaryFile(mode='w', dir=self._dir, delete=False) as f:
+            f.write(content)
+        os.replace(f.name, path)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        # Mounts run in threads and other wdk invocations may run concurrently
+        os.makedirs(self._dir, exist_ok=True)
+        lock_path = os.path.join(self._dir, f'{self._hostname}.{self.name}.lock')
+        with self._lock, open(lock_path, 'w') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+
+class EngineSync(HostSync):
+    """The sync engine of wdk, see wazo_sdk.sync_engine"""
+
+    name = SYNC_ENGINE_WDK
+
+    def wait_ready(self, repo: str, timeout: int) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status = self._read_status().get('repos', {}).get(repo, {})
+            if status.get('state') == 'ready':
+                return True
+            if status.get('state') == 'error':
+                raise Exception(f'{repo}: sync failed: {status.get("error")}')
+            time.sleep(_POLL_INTERVAL)
+        return False
+
+    def _is_sync_process(self, cmdline: list[str]) -> bool:
+        return 'wazo_sdk.sync_engine' in cmdline
+
+    def _start(self) -> None:
+        command = [sys.executable, '-m', 'wazo_sdk.sync_engine', self.config_path]
+        self.logger.debug('%s', ' '.join(command))
+        with open(self.log_path, 'a') as log:
+            proc = subprocess.Popen(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+        with open(self.pid_path, 'w') as f:
+            f.write(str(proc.pid))
+
+        # Signals sent before the engine is listening would kill it
+        deadline = time.monotonic() + _START_TIMEOUT
+        while self._read_status().get('pid') != proc.pid:
+            if proc.poll() is not None or time.monotonic() > deadline:
+                raise Exception(f'sync engine failed to start, see {self.log_path}')
+            time.sleep(_POLL_INTERVAL)
+
+    def _read_status(self) -> dict[str, Any]:
+        try:
+            with open(self.status_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+
+class LsyncdSync(HostSync):
+    """One lsyncd with a sync block per repository, restarted by SIGHUP"""
+
+    name = SYNC_ENGINE_LSYNCD
+
+    def __init__(
+        self, logger: Logger, config: Config, hostname: str, ssh: SSHSession
+    ) -> None:
+        super().__init__(logger, config, hostname, ssh)
+        self.lsync_config_path = os.path.join(self._dir, f'{hostname}.lsyncd.lua')
+
+    def _is_sync_process(self, cmdline: list[str]) -> bool:
+        return bool(cmdline) and os.path.basename(cmdline[0]) == 'lsyncd'
+
+    def _write_config(self, repos: dict[str, RepoConfig]) -> None:
+        super()._write_config(repos)
+        config = self._template().render(
+            host=self._hostname,
+            log=self.log_path,
+            rsh=shlex.join(self._ssh.command_line()),
+            repos=[repos[name] for name in sorted(repos)],
+        )
+        self._write_file(self.lsync_config_path, config)
+
+    @staticmethod
+    @functools.cache
+    def _template() -> Template:
+        from jinja2 import Template
+
+        return Template(LSYNC_CONFIG_TEMPLATE)
+
+    def _start(self) -> None:
+        command = ['lsyncd', self.lsync_config_path, '--pidfile', self.pid_path]
+        self.logger.debug('%s', ' '.join(command))
+        # lsyncd returns once it is running in the background
+        try:
+            result = subprocess.run(command, timeout=_START_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            raise Exception(f'{" ".join(command)} failed: timeout')
+        if result.returncode != 0:
+            raise Exception(f'{" ".join(command)} failed: {result.returncode}')
+
+        deadline = time.monotonic() + _START_TIMEOUT
+        while not self.is_running():
+            if time.monotonic() > deadline:
+                raise Exception(f'lsyncd failed to start, see {self.log_path}')
+            time.sleep(_POLL_INTERVAL)
+
+
+HOST_SYNCS: dict[str, type[HostSync]] = {
+    SYNC_ENGINE_LSYNCD: LsyncdSync,
+    SYNC_ENGINE_WDK: EngineSync,
+}
+
+
+class SyncSupervisor:
+    """Keeps the sync process of every host alive
+
+    The status of each process is checked once, restarting the dead ones, and
+    kept for the lifetime of the supervisor.
+    """
+
+    def __init__(self, logger: Logger, config: Config, ssh: SSHSessionManager) -> None:
+        self.logger = logger
+        self._config = config
+        self._ssh = ssh
+        self._host_syncs: dict[tuple[str, str], HostSync] = {}
+        self._status: dict[tuple[str, str], SyncStatus] | None = None
+        self._lock = threading.RLock()
+
+    def get(self, hostname: str, engine: str) -> HostSync:
+        with self._lock:
+            key = (hostname, engine)
+            if key not in self._host_syncs:
+                if engine not in HOST_SYNCS:
+                    raise Exception(f'Unknown sync engine: {engine}')
+                self._host_syncs[key] = HOST_SYNCS[engine](
+                    self.logger, self._config, hostname, self._ssh.get(hostname)
+                )
+            return self._host_syncs[key]
+
+    def is_running(self, hostname: str, engine: str) -> bool:
+        status = self.check().get((hostname, engine))
+        return bool(status and status['running'])
+
+    def check(self) -> dict[tuple[str, str], SyncStatus]:
+        with self._lock:
+            if self._status is None:
+                self._status = {}
+                for hostname, engine in self._find_host_syncs():
+                    status = self._check_one(hostname, engine)
+                    if status:
+                        self._status[(hostname, engine)] = status
+            return self._status
+
+    def invalidate(self, hostname: str, engine: str) -> None:
+        """Forgets the cached status of a host after mounting or unmounting"""
+        with self._lock:
+            if self._status is not None:
+                self._status.pop((hostname, engine), None)
+                status = self._check_one(hostname, engine)
+                if status:
+                    self._status[(hostname, engine)] = status
+
+    def _check_one(self, hostname: str, engine: str) -> SyncStatus | None:
+        try:
+            host_sync = self.get(hostname, engine)
+        except Exception as e:
+            self.logger.debug('%s: %s', hostname, e)
+            return None
+
+        repos = host_sync.repos()
+        if not repos:
+            return None
+
+        restarted = False
+        try:
+            restarted = host_sync.ensure_running()
+        except Exception:
+            self.logger.exception(
+                'failed to restart the %s sync of %s', engine, hostname
+            )
+        if restarted:
+            self.logger.warning(
+                'the %s sync of %s was not running, restarted it', engine, hostname
+            )
+
+        return {
+            'host': hostname,
+            'engine': engine,
+            'repos': repos,
+            'running': host_sync.is_running(),
+            'restarted': restarted,
+        }
+
+    def _find_host_syncs(self) -> list[tuple[str, str]]:
+        try:
+            filenames = os.listdir(os.path.join(self._config.cache_dir, SYNC_DIRNAME))
+        except OSError:
+            return []
+
+        host_syncs = []
+        for filename in filenames:
+            if not filename.endswith(_CONFIG_SUFFIX) or filename.endswith(
+                _STATUS_SUFFIX
+            ):
+                continue
+            hostname, _, engine = filename[: -len(_CONFIG_SUFFIX)].rpartition('.')
+            if hostname and engine in HOST_SYNCS:
+                host_syncs.append((hostname, engine))
+        return host_syncs
@@ -0,0 +1,356 @@
+# Copyright 2026 The Wazo Authors  (see the AUTHORS file)
+# SPDX-License-Identifier: GPL-3.0+
+
+"""Keep every repository mounted on a host in sync from a single process
+
+Run as `python3 -m wazo_sdk.sync_engine <config file>`. The configuration is
+re-read on SIGHUP and the process exits on SIGTERM.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import TYPE_CHECKING, Any
+
+from wazo_sdk import inotify
+from wazo_sdk.manifest import EXCLUDED_DIRS
+
+if TYPE_CHECKING:
+    from typing import Literal, TypedDict
+
+    class RepoConfig(TypedDict):
+        source: str
+        destination: str
+
+    class EngineConfig(TypedDict):
+        hostname: str
+        rsh: str
+        status_file: str
+        repos: dict[str, RepoConfig]
+
+    class RepoStatus(TypedDict):
+        state: Literal['syncing', 'ready', 'error']
+        last_sync: float | None
+        error: str | None
+
+
+logger = logging.getLogger('wdk-sync')
+
+WATCH_MASK = (
+    inotify.IN_ATTRIB
+    | inotify.IN_CLOSE_WRITE
+    | inotify.IN_CREATE
+    | inotify.IN_DELETE
+    | inotify.IN_MOVED_FROM
+    | inotify.IN_MOVED_TO
+    | inotify.IN_ONLYDIR
+    | inotify.IN_DONT_FOLLOW
+    | inotify.IN_EXCL_UNLINK
+)
+
+# A batch is pushed once no event came for the quiet delay. The delay grows
+# with the size of the batch, so that a checkout is sent in one go while a
+# single saved file is sent right away, but a batch never waits longer than
+# the maximum delay.
+MIN_QUIET_DELAY = 0.05
+MAX_QUIET_DELAY = 0.5
+MAX_BATCH_DELAY = 1.0
+EVENTS_PER_QUIET_STEP = 50
+RETRY_DELAY = 2.0
+
+RSYNC_OPTIONS = [
+    '--xattrs',
+    '--archive',
+    '--perms',
+    *(f'--exclude={name}' for name in sorted(EXCLUDED_DIRS)),
+]
+RSYNC_BATCH_OPTIONS = [
+    '--from0',
+    '--files-from=-',
+    '--delete-missing-args',
+    # deleted directories are removed even when they are not empty remotely
+    '--force',
+]
+
+
+class SyncEngine:
+    def __init__(self, config_filename: str) -> None:
+        self._config_filename = config_filename
+        self._config: EngineConfig = {
+            'hostname': '',
+            'rsh': 'ssh',
+            'status_file': '',
+            'repos': {},
+        }
+        self._inotify = inotify.Inotify()
+        # watch descriptor -> (repo name, directory relative to the repo)
+        self._watches: dict[int, tuple[str, str]] = {}
+        self._status: dict[str, RepoStatus] = {}
+        self._pending: dict[str, set[str]] = {}
+        self._event_count = 0
+        self._first_event_at = 0.0
+        self._last_event_at = 0.0
+        self._retry_at = 0.0
+        self._running = True
+        self._reload_requested = True
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+
+    def run(self) -> None:
+        self._wakeup_w.setblocking(False)
+        signal.set_wakeup_fd(self._wakeup_w.fileno())
+        signal.signal(signal.SIGHUP, self._on_reload)
+        signal.signal(signal.SIGTERM, self._on_terminate)
+
+        while self._running:
+            if self._reload_requested:
+                self._reload_requested = False
+                self._reload()
+
+            readable, _, _ = select.select(
+                [self._inotify.fileno(), self._wakeup_r.fileno()],
+                [],
+                [],
+                self._next_timeout(),
+            )
+            if self._wakeup_r.fileno() in readable:
+                self._wakeup_r.recv(4096)
+            if self._inotify.fileno() in readable:
+                self._handle_events(self._inotify.read())
+
+            if self._batch_is_due():
+                self._flush()
+
+        self._inotify.close()
+        try:
+            os.unlink(self._config['status_file'])
+        except OSError:
+            pass
+
+    def _on_reload(self, signum: int, frame: Any) -> None:
+        self._reload_requested = True
+
+    def _on_terminate(self, signum: int, frame: Any) -> None:
+        self._running = False
+
+    def _reload(self) -> None:
+        with open(self._config_filename) as f:
+            self._config = json.load(f)
+        logger.info('configuration loaded: %s', ', '.join(self._config['repos']))
+
+        wanted = self._config['repos']
+        for repo in set(self._status) - set(wanted):
+            self._unwatch(repo, '')
+            self._pending.pop(repo, None)
+            del self._status[repo]
+
+        for repo in wanted:
+            if repo in self._status:
+                continue
+            self._status[repo] = {'state': 'syncing', 'last_sync': None, 'error': None}
+            self._write_status()
+            # Watching first so that nothing changed during the copy gets lost
+            self._watch(repo, '')
+            self._initial_sync(repo)
+        self._write_status()
+
+    def _initial_sync(self, repo: str) -> None:
+        repo_config = self._config['repos'][repo]
+        command = [
+            'rsync',
+            *RSYNC_OPTIONS,
+            '--delete',
+            '--rsh',
+            self._config['rsh'],
+            f'{repo_config["source"]}/',
+            f'{self._config["hostname"]}:{repo_config["destination"]}/',
+        ]
+        self._run_rsync(command, None, [repo])
+
+    def _watch(self, repo: str, relative_dir: str) -> list[str]:
+        """Watch a directory tree, returns the files found in it"""
+        root = self._config['repos'][repo]['source']
+        files = []
+        pending = [relative_dir]
+        while pending:
+            directory = pending.pop()
+            try:
+                wd = self._inotify.add_watch(os.path.join(root, directory), WATCH_MASK)
+                self._watches[wd] = (repo, directory)
+                with os.scandir(os.path.join(root, directory)) as it:
+                    for entry in it:
+                        path = os.path.join(directory, entry.name)
+                        if not entry.is_dir(follow_symlinks=False):
+                            files.append(path)
+                        elif entry.name not in EXCLUDED_DIRS:
+                            pending.append(path)
+            except OSError as e:
+                # Removed while walking, its deletion event follows
+                logger.debug('cannot watch %s: %s', directory, e)
+        return files
+
+    def _unwatch(self, repo: str, relative_dir: str) -> None:
+        prefix = os.path.join(relative_dir, '')
+        for wd, (watched_repo, directory) in list(self._watches.items()):
+            if watched_repo != repo:
+                continue
+            if relative_dir and directory != relative_dir:
+                if not directory.startswith(prefix):
+                    continue
+            self._inotify.rm_watch(wd)
+            del self._watches[wd]
+
+    def _handle_events(self, events: list[inotify.Event]) -> None:
+        for event in events:
+            if event.mask & inotify.IN_Q_OVERFLOW:
+                logger.warning('inotify queue overflow, resyncing everything')
+                for repo in self._config['repos']:
+                    self._initial_sync(repo)
+                continue
+
+            if event.wd not in self._watches:
+                continue
+
+            repo, directory = self._watches[event.wd]
+            if event.mask & inotify.IN_IGNORED:
+                del self._watches[event.wd]
+                continue
+            if not event.name or event.name in EXCLUDED_DIRS:
+                continue
+
+            path = os.path.join(directory, event.name)
+            changed = [path]
+            if event.mask & inotify.IN_ISDIR:
+                if event.mask & (inotify.IN_CREATE | inotify.IN_MOVED_TO):
+                    changed.extend(self._watch(repo, path))
+                elif event.mask & inotify.IN_MOVED_FROM:
+                    self._unwatch(repo, path)
+
+            self._pending.setdefault(repo, set()).update(changed)
+            now = time.monotonic()
+            if not self._event_count:
+                self._first_event_at = now
+            self._last_event_at = now
+            self._event_count += 1
+
+    def _quiet_delay(self) -> float:
+        steps = 1 + self._event_count // EVENTS_PER_QUIET_STEP
+        return min(MIN_QUIET_DELAY * steps, MAX_QUIET_DELAY)
+
+    def _next_timeout(self) -> float | None:
+        if not self._pending:
+            return None
+        due = min(
+            self._last_event_at + self._quiet_delay(),
+            self._first_event_at + MAX_BATCH_DELAY,
+        )
+        # Already due when overdue, select rejects a negative timeout
+        return max(0.0, max(due, self._retry_at) - time.monotonic())
+
+    def _batch_is_due(self) -> bool:
+        timeout = self._next_timeout()
+        return timeout is not None and timeout <= 0
+
+    def _flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        self._event_count = 0
+
+        # Repositories with the same name on both ends share their parent
+        # directories and go in the same transfer
+        groups: dict[tuple[str, str], list[tuple[str, str]]] = {}
+        for repo, paths in pending.items():
+            repo_config = self._config['repos'][repo]
+            source = repo_config['source']
+            destination = repo_config['destination']
+            name = os.path.basename(source)
+            if name == os.path.basename(destination):
+                key = (os.path.dirname(source), os.path.dirname(destination))
+                groups.setdefault(key, []).extend(
+                    (repo, os.path.join(name, path)) for path in paths
+                )
+            else:
+                groups.setdefault((source, destination), []).extend(
+                    (repo, path) for path in paths
+                )
+
+        for (source, destination), entries in groups.items():
+            repos = sorted({repo for repo, _ in entries})
+            command = [
+                'rsync',
+                *RSYNC_OPTIONS,
+                *RSYNC_BATCH_OPTIONS,
+                '--rsh',
+                self._config['rsh'],
+                f'{source}/',
+                f'{self._config["hostname"]}:{destination}/',
+            ]
+            files = '\0'.join(sorted(path for _, path in entries))
+            if not self._run_rsync(command, files, repos):
+                # Kept for the next batch
+                for repo, path in entries:
+                    relative = os.path.relpath(
+                        os.path.join(source, path),
+                        self._config['repos'][repo]['source'],
+                    )
+                    self._pending.setdefault(repo, set()).add(relative)
+                self._retry_at = time.monotonic() + RETRY_DELAY
+                self._first_event_at = self._last_event_at = time.monotonic()
+        self._write_status()
+
+    def _run_rsync(
+        self, command: list[str], files: str | None, repos: list[str]
+    ) -> bool:
+        started_at = time.monotonic()
+        result = subprocess.run(
+            command,
+            input=files,
+            text=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        logger.debug(
+            '%s: %s files in %.3fs',
+            ', '.join(repos),
+            'all' if files is None else files.count('\0') + 1,
+            time.monotonic() - started_at,
+        )
+        for repo in repos:
+            if repo not in self._status:
+                continue
+            if result.returncode == 0:
+                self._status[repo] = {
+                    'state': 'ready',
+                    'last_sync': time.time(),
+                    'error': None,
+                }
+            else:
+                logger.error('rsync failed for %s: %s', repo, result.stderr.strip())
+                self._status[repo]['state'] = 'error'
+                self._status[repo]['error'] = result.stderr.strip()
+        return result.returncode == 0
+
+    def _write_status(self) -> None:
+        status_file = self._config['status_file']
+        directory = os.path.dirname(status_file)
+        with tempfile.NamedTemporaryFile(mode='w', dir=directory, delete=False) as f:
+            json.dump({'pid': os.getpid(), 'repos': self._status}, f)
+        os.replace(f.name, status_file)
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.DEBUG, format='%(asctime)s %(levelname)s %(message)s'
+    )
+    SyncEngine(sys.argv[1]).run()
+
+
+if __name__ == '__main__':
+    main()